@@ -1,4 +1,5 @@
-from fastapi import APIRouter
+import os
+from fastapi import APIRouter, UploadFile, File, Form
 from fastapi.responses import JSONResponse
 from .services import clip_anything_controller
 
@@ -12,5 +13,5 @@ async def clip_video(file: UploadFile = File(...), text_prompt: str = Form(...))
     with open(video_path, "wb") as f:
         f.write(await file.read())
 
-    result = clip_anything_controller.process_clip_video(video_path, text_prompt)
+    result = clip_anything_controller.process_video(video_path, text_prompt)
     return JSONResponse(result)
\ No newline at end of file
@@ -27,8 +27,8 @@ def thumbnail_generator(mode: int, file: UploadFile = None, prompt: str = None,
         with open(temp_path, "wb") as f:
             f.write(file.file.read())
 
-        video_path, frame_idx = select_best_frame(temp_path)
-        thumbnail_path, size = generate_thumbnail_background(video_path, download_path, time_sec=frame_idx / 30)
+        video_path, time_sec = select_best_frame(temp_path)
+        thumbnail_path, size = generate_thumbnail_background(video_path, download_path, time_sec=time_sec)
         
         if text is not None:
             text_opts, icon_opts = generate_thumbnail_overlays(text, size)
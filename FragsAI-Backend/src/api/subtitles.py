@@ -1,8 +1,9 @@
+import os
 from fastapi import APIRouter,UploadFile,File
 from fastapi.responses import JSONResponse
 from services.subtitles import (
-    transcribe,extract_audio,generate_subtitle_file,
-    add_subtitle_to_video,
+    transcribe,load_audio,generate_subtitle_file,
+    burn_subtitles,
 )
 from config import settings
 router=APIRouter()
@@ -11,17 +12,17 @@ router=APIRouter()
 def add_subtitles(file:UploadFile=File(...)):
     video_path=os.path.join(settings.upload_folder, file.filename)
 
-    ## Extract audio
-    audio=extract_audio(video_path)
+    ## Decode audio in memory
+    audio=load_audio(video_path)
 
     ## Transcribe audio
     language,segments=transcribe(audio)
 
     ## Create srt file
-    subtitle_file=generate_subtitle_file(language,segments)
+    subtitle_file=generate_subtitle_file(language,segments,video_path)
 
-    ## Overlay Subtitles on clip
-    output_video=add_subtitle_to_video(video_path,subtitle_file,font='Ariel',color='Red')
+    ## Burn subtitles into the clip with ffmpeg on the shared encode workers
+    output_video=burn_subtitles(video_path,subtitle_file,font='Ariel',color='Red')
 
 
     return JSONResponse({"output_video":output_video})
\ No newline at end of file
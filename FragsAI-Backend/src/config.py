@@ -16,5 +16,35 @@ class Settings(BaseSettings):
     openai_key: str = os.environ.get("OPENAI_API_KEY")
     cfg_path: str | None = os.environ.get("CFG_PATH", os.path.abspath("models/pretrained/yolov3.cfg"))
     weight_path: str | None = os.environ.get("WEIGHT_PATH", os.path.abspath("models/pretrained/yolo.weights"))        
+    screen_cfg_path: str | None = os.environ.get("SCREEN_CFG_PATH")
+    screen_weight_path: str | None = os.environ.get("SCREEN_WEIGHT_PATH")
+    detection_cascade: bool = os.environ.get("DETECTION_CASCADE", "false").lower() == "true"
+    detection_tracking: bool = os.environ.get("DETECTION_TRACKING", "false").lower() == "true"
+    detection_game: str | None = os.environ.get("DETECTION_GAME")
+    ranking_processes: bool = os.environ.get("RANKING_PROCESSES", "false").lower() == "true"
+    ranking_workers: int | None = int(os.environ["RANKING_WORKERS"]) if os.environ.get("RANKING_WORKERS") else None
+    rank_uploads: bool = os.environ.get("RANK_UPLOADS", "true").lower() == "true"
+    speech_map_uploads: bool = os.environ.get("SPEECH_MAP_UPLOADS", "false").lower() == "true"
+    subtitle_clips: bool = os.environ.get("SUBTITLE_CLIPS", "false").lower() == "true"
+    top_k_clips: int = int(os.environ.get("TOP_K_CLIPS", 10))
+    whisper_model: str = os.environ.get("WHISPER_MODEL", "small")
+    whisper_device: str = os.environ.get("WHISPER_DEVICE", "cpu")
+    whisper_compute_type: str = os.environ.get("WHISPER_COMPUTE_TYPE", "int8")
+    whisper_cpu_threads: int = int(os.environ.get("WHISPER_CPU_THREADS", 0))
+    whisper_num_workers: int = int(os.environ.get("WHISPER_NUM_WORKERS", 2))
+    whisper_batch_size: int = int(os.environ.get("WHISPER_BATCH_SIZE", 8))
+    encode_workers: int | None = int(os.environ["ENCODE_WORKERS"]) if os.environ.get("ENCODE_WORKERS") else None
+    encode_threads: int | None = int(os.environ["ENCODE_THREADS"]) if os.environ.get("ENCODE_THREADS") else None
+    proxy_uploads: bool = os.environ.get("PROXY_UPLOADS", "false").lower() == "true"
+    proxy_height: int = int(os.environ.get("PROXY_HEIGHT", 360))
+    proxy_fps: int = int(os.environ.get("PROXY_FPS", 10))
+    florence2_model: str = os.environ.get("FLORENCE2_MODEL", "large")
+    florence2_device: str = os.environ.get("FLORENCE2_DEVICE", "auto")
+    florence2_dtype: str = os.environ.get("FLORENCE2_DTYPE", "auto")
+    florence2_quantize: bool = os.environ.get("FLORENCE2_QUANTIZE", "false").lower() == "true"
+    torch_threads: int | None = int(os.environ["TORCH_THREADS"]) if os.environ.get("TORCH_THREADS") else None
+    detection_cache_folder: str = os.environ.get("DETECTION_CACHE_FOLDER", "media/cache/detections")
+    detection_cache_size: int = int(os.environ.get("DETECTION_CACHE_SIZE", 256))
+    speech_cache_folder: str = os.environ.get("SPEECH_CACHE_FOLDER", "media/cache/speech")
 
 settings = Settings()
\ No newline at end of file
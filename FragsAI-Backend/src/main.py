@@ -4,6 +4,8 @@ from fastapi.responses import JSONResponse
 from config import settings
 from api.router import router as api_router
 from websocket.router import router as ws_router
+from services.virality_ranking import shutdown_ranking_pool
+from services.encoder import encode_scheduler
 
 app = FastAPI()
 app.add_middleware(
@@ -28,6 +30,11 @@ app.add_middleware(
 app.include_router(api_router, prefix="/api")
 app.include_router(ws_router, prefix="/ws")
 
+@app.on_event("shutdown")
+def shutdown_workers():
+    shutdown_ranking_pool()
+    encode_scheduler.shutdown()
+
 @app.get("/")
 async def server_status():
     return JSONResponse({"message": "LLM server is active and running"})
@@ -0,0 +1,43 @@
+import numpy as np
+
+# One row per detection, boxes are (x, y, w, h) in full-frame pixels
+DETECTION_DTYPE = np.dtype([
+    ("frame", np.int32),
+    ("class_id", np.int16),
+    ("confidence", np.float32),
+    ("box", np.int32, (4,))
+])
+
+def empty_detections():
+    return np.empty(0, dtype=DETECTION_DTYPE)
+
+def concatenate_detections(chunks: list):
+    return np.concatenate(chunks) if chunks else empty_detections()
+
+def count_events(detections: np.ndarray, labels: list):
+    """
+    Returns the number of detections per label as a dict, skipping labels that never occur.
+    """
+    counts = np.bincount(detections["class_id"], minlength=len(labels))
+    return {labels[class_id]: int(count) for class_id, count in enumerate(counts) if count}
+
+def weight_events(detections: np.ndarray, labels: list, weights: dict, default_weight=0.5):
+    """
+    Sums the weight of every detection in a single vectorized pass.
+    """
+    weight_by_class = np.array([weights.get(label, default_weight) for label in labels], dtype=np.float64)
+    return float(weight_by_class[detections["class_id"]].sum())
+
+def to_records(detections: np.ndarray, labels: list):
+    """
+    Converts detections into the list-of-dicts form used by the JSON responses.
+    """
+    return [
+        {
+            "frame": int(frame),
+            "action": labels[class_id],
+            "confidence": float(confidence),
+            "box": box.tolist()
+        }
+        for frame, class_id, confidence, box in zip(detections["frame"], detections["class_id"], detections["confidence"], detections["box"])
+    ]
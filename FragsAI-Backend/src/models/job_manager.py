@@ -6,6 +6,7 @@ class Job():
         self.id = id
         self.video_progress = 0
         self.motion_progress = 0
+        self.leaderboard = []
     
     def get_status(self):
         return self.status
@@ -28,10 +29,17 @@ class Job():
     def set_motion_progress(self, progress: int):
         self.motion_progress = progress
 
+    def get_leaderboard(self):
+        return self.leaderboard
+
+    def set_leaderboard(self, leaderboard: list):
+        self.leaderboard = leaderboard
+
     def get_JSON(self):
         return {
             "clip_progress": self.video_progress,
-            "motion_progress": self.motion_progress
+            "motion_progress": self.motion_progress,
+            "leaderboard": self.leaderboard
         }
     
 class JobManager():
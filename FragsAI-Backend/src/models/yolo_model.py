@@ -1,4 +1,7 @@
 import cv2
+import os
+import hashlib
+import threading
 from config import settings
 
 DEFAULT_CLASS_LABELS = [
@@ -14,6 +17,17 @@ class YOLOModel():
         self.net = cv2.dnn.readNet(weights_path, cfg_path)
         layer_names = self.net.getLayerNames()
         self.output_layers = [layer_names[i - 1] for i in self.net.getUnconnectedOutLayers().flatten()]
+        self.version = self._compute_version(weights_path, cfg_path)
+
+    @staticmethod
+    def _compute_version(weights_path, cfg_path):
+        # Weights are too large to hash on startup, their size and mtime identify them well enough
+        digest = hashlib.sha1()
+        with open(cfg_path, "rb") as f:
+            digest.update(f.read())
+        stat = os.stat(weights_path)
+        digest.update(f"{stat.st_size}:{int(stat.st_mtime)}".encode())
+        return digest.hexdigest()[:12]
 
     def get_model(self):
         return self.net
@@ -24,7 +38,26 @@ class YOLOModel():
     def get_class_labels(self):
         return self.class_labels
     
+    def get_version(self):
+        return self.version
+
     def get_details(self):
         return self.net, self.output_layers, self.class_labels
 
 yolo_model = YOLOModel(settings.weight_path, settings.cfg_path, DEFAULT_CLASS_LABELS)
+
+# The screening model for cascaded detection is only loaded the first time a cascade runs.
+# A tiny config can be supplied through SCREEN_CFG_PATH/SCREEN_WEIGHT_PATH, otherwise a
+# second instance of the full model is used at a reduced input size.
+_screen_model = None
+_screen_model_lock = threading.Lock()
+
+def get_screen_model():
+    global _screen_model
+    with _screen_model_lock:
+        if _screen_model is None:
+            if settings.screen_cfg_path and settings.screen_weight_path:
+                _screen_model = YOLOModel(settings.screen_weight_path, settings.screen_cfg_path, DEFAULT_CLASS_LABELS)
+            else:
+                _screen_model = YOLOModel(settings.weight_path, settings.cfg_path, DEFAULT_CLASS_LABELS)
+    return _screen_model
@@ -1,8 +1,14 @@
 import cv2
 import numpy as np
 import logging
+import time
 from tqdm import tqdm
-from models.yolo_model import yolo_model
+from config import settings
+from models.yolo_model import yolo_model, get_screen_model
+from models.detections import DETECTION_DTYPE, empty_detections, concatenate_detections, to_records
+from .detection_cache import detection_cache
+from .roi_profiles import get_roi_profile, get_region_box
+from .tracking import IoUTracker
 
 # Please specify this in the .env.local for config, this will default to None and expect to find it inside of models
 
@@ -23,60 +29,242 @@ CONFIDENCE_THRESHOLD = 0.5
 NMS_THRESHOLD = 0.4
 INPUT_SIZE = (416, 416)
 
-# Extract features from video
-def extract_features(video_path: str, frame_rate=5):
-    net, output_layers, labels = yolo_model.get_details()
+# Cascade mode: every sampled frame is screened at a reduced input size and only
+# frames whose best class score passes SCREEN_THRESHOLD are run through the full model
+SCREEN_INPUT_SIZE = (320, 320)
+SCREEN_THRESHOLD = 0.3
+
+# ROI crops are small, so they run at a reduced input size unless batched with the full frame
+ROI_INPUT_SIZE = (320, 320)
+
+class CascadeStats():
+    def __init__(self):
+        self.frames_screened = 0
+        self.frames_escalated = 0
+        self.screen_time = 0.0
+        self.full_time = 0.0
+
+    def get_hit_rate(self):
+        return self.frames_escalated / self.frames_screened if self.frames_screened else 0.0
+
+    def get_JSON(self):
+        return {
+            "frames_screened": self.frames_screened,
+            "frames_escalated": self.frames_escalated,
+            "hit_rate": round(self.get_hit_rate(), 4),
+            "screen_time": round(self.screen_time, 3),
+            "full_time": round(self.full_time, 3),
+            "screen_ms_per_frame": round(self.screen_time / self.frames_screened * 1000, 2) if self.frames_screened else 0.0,
+            "full_ms_per_frame": round(self.full_time / self.frames_escalated * 1000, 2) if self.frames_escalated else 0.0
+        }
+
+def run_detector(net, output_layers, frame, input_size=INPUT_SIZE):
+    blob = cv2.dnn.blobFromImage(frame, 0.00392, input_size, (0, 0, 0), True, crop=False)
+    net.setInput(blob)
+    return net.forward(output_layers)
+
+def get_screen_score(outputs):
+    return max((float(np.max(output[:, 5:])) for output in outputs if len(output)), default=0.0)
+
+def parse_detections(outputs, frame_idx, width, height):
+    """
+    Converts raw YOLO outputs into a structured detection array in one vectorized pass.
+    """
+    rows = np.concatenate([output.reshape(-1, output.shape[-1]) for output in outputs])
+    scores = rows[:, 5:]
+    class_ids = np.argmax(scores, axis=1)
+    confidences = scores[np.arange(len(rows)), class_ids]
+    keep = confidences > CONFIDENCE_THRESHOLD
+    rows, class_ids, confidences = rows[keep], class_ids[keep], confidences[keep]
+
+    detections = np.empty(len(rows), dtype=DETECTION_DTYPE)
+    detections["frame"] = frame_idx
+    detections["class_id"] = class_ids
+    detections["confidence"] = confidences
+    w = (rows[:, 2] * width).astype(np.int32)
+    h = (rows[:, 3] * height).astype(np.int32)
+    center_x = (rows[:, 0] * width).astype(np.int32)
+    center_y = (rows[:, 1] * height).astype(np.int32)
+    detections["box"] = np.stack([center_x - w // 2, center_y - h // 2, w, h], axis=1)
+    return detections
+
+def suppress_duplicates(detections: np.ndarray):
+    if len(detections) < 2:
+        return detections
+    keep = cv2.dnn.NMSBoxesBatched(detections["box"].tolist(), detections["confidence"].tolist(), detections["class_id"].tolist(), CONFIDENCE_THRESHOLD, NMS_THRESHOLD)
+    return detections[np.array(keep, dtype=np.int64).flatten()]
+
+def detect_regions(net, output_layers, frame, frame_idx, labels, roi_profile, include_full_frame=True):
+    """
+    Runs detection on the configured HUD regions of a frame in a single batched forward pass.
+    Boxes are mapped back into full-frame coordinates.
+    """
+    height, width, _ = frame.shape
+    images, offsets, allowed_classes = [], [], []
+
+    for roi in roi_profile:
+        x, y, w, h = get_region_box(roi['region'], width, height)
+        if w <= 0 or h <= 0:
+            continue
+        images.append(frame[y:y + h, x:x + w])
+        offsets.append((x, y))
+        allowed_classes.append([labels.index(label) for label in roi['labels'] if label in labels])
+
+    if include_full_frame:
+        images.append(frame)
+        offsets.append((0, 0))
+        allowed_classes.append(None)
+
+    if not images:
+        return empty_detections()
+
+    input_size = INPUT_SIZE if include_full_frame else ROI_INPUT_SIZE
+    blob = cv2.dnn.blobFromImages(images, 0.00392, input_size, (0, 0, 0), True, crop=False)
+    net.setInput(blob)
+    outputs = [output.reshape(len(images), -1, output.shape[-1]) for output in net.forward(output_layers)]
+
+    chunks = []
+    for i, image in enumerate(images):
+        image_height, image_width = image.shape[:2]
+        detections = parse_detections([output[i] for output in outputs], frame_idx, image_width, image_height)
+        if allowed_classes[i] is not None:
+            detections = detections[np.isin(detections["class_id"], allowed_classes[i])]
+        detections["box"][:, 0] += offsets[i][0]
+        detections["box"][:, 1] += offsets[i][1]
+        chunks.append(detections)
+
+    detections = concatenate_detections(chunks)
+    return suppress_duplicates(detections) if include_full_frame else detections
+
+def get_model_version(cascade: bool, game: str = None, roi_full_frame=True):
+    version = yolo_model.get_version()
+    if cascade:
+        screen_model = get_screen_model()
+        version += f"-cascade-{screen_model.get_version()}-{SCREEN_INPUT_SIZE[0]}-{SCREEN_THRESHOLD}"
+    if get_roi_profile(game) is not None:
+        version += f"-roi-{game.lower()}{'-full' if roi_full_frame else ''}"
+    return version
+
+def iter_detections(video_path: str, frame_rate=5, use_cache=True, cascade=None, stats: CascadeStats = None, game: str = None, roi_full_frame=True, tracker: IoUTracker = None, keyframe_interval=5):
+    """
+    Runs YOLO over frames sampled at frame_rate per second and yields a structured
+    detection array (see models.detections) for every sampled frame with detections.
+    When a tracker is passed, the detector only runs every keyframe_interval sampled frames
+    (or sooner when a track is lost) and the tracker carries boxes through the frames in between.
+    Track durations can then be read from tracker.get_tracks().
+    """
+    net, output_layers, _ = yolo_model.get_details()
+    cascade = settings.detection_cascade if cascade is None else cascade
+    game = settings.detection_game if game is None else game
+    roi_profile = get_roi_profile(game)
+    model_version = get_model_version(cascade, game, roi_full_frame)
+    # Tracks are not cached, so tracking always decodes the video
+    use_cache = use_cache and tracker is None
+
+    if use_cache:
+        cached = detection_cache.get(video_path, model_version, frame_rate)
+        if cached is not None:
+            logging.info(f"Using cached detections for {video_path}")
+            if len(cached):
+                yield cached
+            return
+
     cap = cv2.VideoCapture(video_path)
 
     if not cap.isOpened():
         logging.error(f"Error: Unable to open video file {video_path}")
-        return []
+        return
 
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     fps = cap.get(cv2.CAP_PROP_FPS)
-    frame_interval = int(fps / frame_rate)
+    frame_interval = max(1, int(fps / frame_rate))
 
-    actions_detected = []
+    if cascade:
+        screen_net, screen_layers, _ = get_screen_model().get_details()
+        stats = stats if stats is not None else CascadeStats()
+
+    # Chunks are only kept around when they need to be written to the cache
+    cached_chunks = []
+    detection_count = 0
+    detector_calls = 0
+    samples_since_keyframe = keyframe_interval
 
     logging.info(f"Extracting features from {video_path}, total frames: {total_frames}")
 
-    frame_idx = 0
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        if frame_idx % frame_interval == 0:
-            height, width, _ = frame.shape
-            blob = cv2.dnn.blobFromImage(frame, 0.00392, INPUT_SIZE, (0, 0, 0), True, crop=False)
-            net.setInput(blob)
-            outputs = net.forward(output_layers)
-
-            for output in outputs:
-                for detection in output:
-                    scores = detection[5:]
-                    class_id = np.argmax(scores)
-                    confidence = scores[class_id]
-                    if confidence > CONFIDENCE_THRESHOLD:
-                        center_x = int(detection[0] * width)
-                        center_y = int(detection[1] * height)
-                        w = int(detection[2] * width)
-                        h = int(detection[3] * height)
-                        x = int(center_x - w / 2)
-                        y = int(center_y - h / 2)
-
-                        actions_detected.append({
-                            'frame': frame_idx,
-                            'action': labels[class_id],
-                            'confidence': float(confidence),
-                            'box': [x, y, w, h]
-                        })
-
-        frame_idx += 1
-
-    cap.release()
-
-    if not actions_detected:
+    try:
+        frame_idx = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            if frame_idx % frame_interval != 0:
+                frame_idx += 1
+                continue
+
+            if tracker is not None and samples_since_keyframe < keyframe_interval:
+                detections, lost = tracker.propagate(frame, frame_idx)
+                samples_since_keyframe = keyframe_interval if lost else samples_since_keyframe + 1
+            else:
+                height, width, _ = frame.shape
+                samples_since_keyframe = 1
+                detections = empty_detections()
+                escalate = True
+
+                if cascade:
+                    start_time = time.perf_counter()
+                    screen_score = get_screen_score(run_detector(screen_net, screen_layers, frame, SCREEN_INPUT_SIZE))
+                    stats.screen_time += time.perf_counter() - start_time
+                    stats.frames_screened += 1
+                    escalate = screen_score >= SCREEN_THRESHOLD
+                    if escalate:
+                        stats.frames_escalated += 1
+
+                if escalate:
+                    start_time = time.perf_counter()
+                    if roi_profile is not None:
+                        detections = detect_regions(net, output_layers, frame, frame_idx, yolo_model.get_class_labels(), roi_profile, roi_full_frame)
+                    else:
+                        detections = parse_detections(run_detector(net, output_layers, frame), frame_idx, width, height)
+                    if cascade:
+                        stats.full_time += time.perf_counter() - start_time
+                    detector_calls += 1
+
+                if tracker is not None:
+                    tracker.update(detections, frame)
+
+            frame_idx += 1
+
+            if len(detections):
+                detection_count += len(detections)
+                if use_cache:
+                    cached_chunks.append(detections)
+                yield detections
+    finally:
+        cap.release()
+
+    if cascade:
+        logging.info(f"Cascade stats for {video_path}: {stats.get_JSON()}")
+
+    if tracker is not None:
+        logging.info(f"Tracking ran the detector on {detector_calls} frames and produced {len(tracker.get_tracks())} tracks")
+
+    if use_cache:
+        detection_cache.put(video_path, model_version, frame_rate, concatenate_detections(cached_chunks))
+
+    if detection_count == 0:
         logging.warning("No actions detected in the video.")
 
-    return actions_detected
+def extract_detections(video_path: str, **kwargs):
+    """
+    Collects every detection of a video into a single structured array.
+    Accepts the same keyword arguments as iter_detections.
+    """
+    return concatenate_detections(list(iter_detections(video_path, **kwargs)))
+
+# Extract features from video
+def extract_features(video_path: str, **kwargs):
+    """
+    List-of-dicts form of extract_detections, kept for JSON responses and older callers.
+    """
+    return to_records(extract_detections(video_path, **kwargs), yolo_model.get_class_labels())
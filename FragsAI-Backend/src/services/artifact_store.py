@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+
+# ioctl request for FICLONE on Linux (btrfs, xfs, overlayfs on top of them)
+FICLONE = 0x40049409
+
+def _reflink(src: str, dst: str):
+    import fcntl
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+
+def _copy_range(src: str, dst: str):
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        remaining = os.fstat(src_file.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src_file.fileno(), dst_file.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+
+def materialize(src: str, dst: str, allow_hardlink: bool = False):
+    """
+    Makes src available at dst without rewriting its bytes when the filesystem allows it.
+    Tries a reflink, then an in-kernel copy_file_range, then a plain copy, so dst never shares
+    an inode with src. Segments are re-exported in place under the same name by later jobs,
+    a hardlink would let them overwrite published clips; pass allow_hardlink only for
+    sources that are never rewritten.
+    Returns the method that was used.
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)
+
+    if allow_hardlink:
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            pass
+
+    for method, copy in (("reflink", _reflink), ("copy_file_range", _copy_range)):
+        try:
+            copy(src, dst)
+            return method
+        except (OSError, ImportError, AttributeError):
+            if os.path.exists(dst):
+                os.remove(dst)
+
+    shutil.copyfile(src, dst)
+    return "copy"
+
+class ArtifactStore():
+    """
+    Publishes ranked clips into one folder per job. Files keep their original names and the
+    ranking lives in a manifest.json next to them. Only the keep_jobs most recently published
+    jobs are kept, older job folders are removed when a new job is published.
+    """
+    def __init__(self, root: str, keep_jobs: int = 8):
+        self.root = root
+        self.keep_jobs = keep_jobs
+        self.lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def get_job_folder(self, job_id: str = None):
+        return os.path.join(self.root, str(job_id or "default"))
+
+    def get_manifest_path(self, job_id: str = None):
+        return os.path.join(self.get_job_folder(job_id), "manifest.json")
+
+    def remove_job(self, job_id: str = None):
+        shutil.rmtree(self.get_job_folder(job_id), ignore_errors=True)
+
+    def prune(self, keep_job_id: str = None):
+        """
+        Removes the folders of all but the keep_jobs most recently published jobs.
+        """
+        keep_folder = self.get_job_folder(keep_job_id)
+        folders = [os.path.join(self.root, name) for name in os.listdir(self.root)]
+        folders = [folder for folder in folders if os.path.isdir(folder) and folder != keep_folder]
+        folders.sort(key=os.path.getmtime, reverse=True)
+        for folder in folders[max(self.keep_jobs - 1, 0):]:
+            shutil.rmtree(folder, ignore_errors=True)
+            logging.info(f"Removed published clips of previous job {os.path.basename(folder)}")
+
+    def publish_ranking(self, ranked_clips, job_id: str = None):
+        job_folder = self.get_job_folder(job_id)
+        with self.lock:
+            # A job published again starts from an empty folder, so no stale clips survive
+            self.remove_job(job_id)
+            os.makedirs(job_folder, exist_ok=True)
+            self.prune(job_id)
+
+        entries = []
+        for rank, (score, clip) in enumerate(ranked_clips, start=1):
+            path = os.path.join(job_folder, os.path.basename(clip))
+            if os.path.abspath(clip) != os.path.abspath(path):
+                method = materialize(clip, path)
+            else:
+                method = "in_place"
+            entries.append({
+                "rank": rank,
+                "score": round(float(score), 2),
+                "source": clip,
+                "path": path,
+                "method": method
+            })
+            logging.info(f"Published {clip} -> {path} ({method})")
+
+        manifest = {"job_id": job_id, "created_at": time.time(), "clips": entries}
+        manifest_path = self.get_manifest_path(job_id)
+        temp_path = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, manifest_path)
+        return manifest
+
+    def load_manifest(self, job_id: str = None):
+        manifest_path = self.get_manifest_path(job_id)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path) as f:
+            return json.load(f)
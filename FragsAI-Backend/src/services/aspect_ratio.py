@@ -1,54 +1,88 @@
-import moviepy.editor as mp
+import ffmpeg
 import logging
 import os
+from .encoder import encode_scheduler
+from .smart_crop import smart_crop_video
 
-def enhance_video_aspect_ratio(input_video, output_folder, desired_aspect_ratio=9/16, target_width=720, target_height=1280):
+def get_output_size(width, height, desired_aspect_ratio=9/16, target_width=720, target_height=1280):
+    """
+    Output frame size for a video of the given size, rounded to even dimensions for libx264.
+    Wider videos keep target_width and narrower ones keep target_height.
+    """
+    if width / height > desired_aspect_ratio:
+        new_width = target_width
+        new_height = int(new_width / desired_aspect_ratio)
+    else:
+        new_height = target_height
+        new_width = int(new_height * desired_aspect_ratio)
+    return new_width - new_width % 2, new_height - new_height % 2
+
+def build_aspect_ratio_filter(stream, output_width, output_height, mode="pad"):
+    """
+    Adds the filters fitting a video stream into output_width x output_height.
+    Args:
+        stream: ffmpeg-python video stream.
+        mode (str): "pad" scales the whole frame inside the output and adds black bars,
+                    "crop" scales the frame to cover the output and crops the overflow.
+    """
+    if mode == "crop":
+        stream = stream.filter("scale", output_width, output_height, force_original_aspect_ratio="increase")
+        stream = stream.filter("crop", output_width, output_height)
+    else:
+        # Padding is computed from the scaled frame (iw/ih after scale), not the source size
+        stream = stream.filter("scale", output_width, output_height, force_original_aspect_ratio="decrease", force_divisible_by=2)
+        stream = stream.filter("pad", output_width, output_height, "(ow-iw)/2", "(oh-ih)/2", color="black")
+    return stream.filter("setsar", 1)
+
+def enhance_video_aspect_ratio(input_video, output_folder, desired_aspect_ratio=9/16, target_width=720, target_height=1280, mode="pad", preset="veryfast"):
     """
     Enhances the video by adjusting its aspect ratio for platforms like TikTok/Shorts.
+    The video is scaled and padded (or cropped) by one ffmpeg filtergraph in a single encode.
     Args:
         input_video (str): Path to the input video.
         output_folder (str): Folder to save the adjusted video.
         desired_aspect_ratio (float): Desired aspect ratio (e.g., 9/16 for TikTok).
         target_width (int): Target width for the output video.
         target_height (int): Target height for the output video.
+        mode (str): "pad" for black bars, "crop" to fill the frame or "smart" to crop around the subject.
+        preset (str): libx264 preset of the encode.
     Returns:
         str: Path to the output video.
     """
+    if mode == "smart":
+        return smart_crop_video(input_video, output_folder, desired_aspect_ratio, target_width, target_height, preset=preset)
+
     try:
         # Ensure the output folder exists
         os.makedirs(output_folder, exist_ok=True)
 
-        # Load the video
-        video = mp.VideoFileClip(input_video)
-        
         # Get current dimensions
-        width, height = video.size
-        current_aspect_ratio = width / height
-
-        # Adjust dimensions based on the desired aspect ratio
-        if current_aspect_ratio > desired_aspect_ratio:
-            # Width is too large, resize by width and pad top and bottom
-            new_width = target_width
-            new_height = int(new_width / desired_aspect_ratio)
-            video = video.resize(width=new_width)
-            padding_top = (new_height - height) // 2
-            video = video.margin(top=padding_top, bottom=padding_top, color=(0, 0, 0))  # Black padding
-        else:
-            # Height is too large, resize by height and pad left and right
-            new_height = target_height
-            new_width = int(new_height * desired_aspect_ratio)
-            video = video.resize(height=new_height)
-            padding_left = (new_width - width) // 2
-            video = video.margin(left=padding_left, right=padding_left, color=(0, 0, 0))  # Black padding
+        video_stream = next(stream for stream in ffmpeg.probe(input_video)["streams"] if stream["codec_type"] == "video")
+        width, height = int(video_stream["width"]), int(video_stream["height"])
+        output_width, output_height = get_output_size(width, height, desired_aspect_ratio, target_width, target_height)
 
         # Define output video path
         output_video = os.path.join(output_folder, os.path.basename(input_video).replace(".mp4", "_aspect_ratio.mp4"))
-        
-        # Write the video file with audio
-        video.write_videofile(output_video, codec="libx264", audio_codec="aac")
+
+        source = ffmpeg.input(input_video)
+        video = build_aspect_ratio_filter(source.video, output_width, output_height, mode)
+        stream = ffmpeg.output(
+            video, output_video, vcodec="libx264", preset=preset, acodec="aac", map="0:a?",
+            **encode_scheduler.get_output_args()
+        )
+        encode_scheduler.run(stream)
 
         logging.info(f"Video enhanced for aspect ratio {desired_aspect_ratio}: {output_video}")
         return output_video
     except Exception as e:
         logging.error(f"Error enhancing video aspect ratio: {e}")
         return None
+
+def enhance_videos_aspect_ratio(input_videos, output_folder, **kwargs):
+    """
+    Converts a batch of clips in parallel on the shared encode scheduler.
+    Takes the same keyword arguments as enhance_video_aspect_ratio.
+    Returns:
+        list: Output paths in the order of input_videos, None for clips that failed.
+    """
+    return encode_scheduler.map(lambda input_video: enhance_video_aspect_ratio(input_video, output_folder, **kwargs), input_videos)
@@ -32,9 +32,12 @@ import nltk
 
 # Logging and warnings
 import math
+import queue
 import logging
+import threading
 import warnings
 warnings.filterwarnings('ignore')
+from config import settings
 
 # Download stopwords if not already present
 # nltk.download('stopwords')
@@ -202,26 +205,220 @@ def fetch_frames_and_indices_from_batches(base_dir, video_path, batches=True):
     else:
         return [all_frames], [all_indices]
 
+def stream_frames_and_indices(video_path, sample_interval=15, batch_size=32, max_queued_batches=4):
+    """
+    Streams sampled frames and their indices straight from the decoder, without writing them to disk.
+    A decoder thread fills a bounded queue, so inference can start on the first batch while
+    the rest of the video is still being decoded and at most max_queued_batches are held in memory.
+
+    Args:
+        video_path (str): Path to the input video file.
+        sample_interval (int, optional): Only every sample_interval-th frame is yielded (default is 15).
+        batch_size (int, optional): Number of frames per yielded batch (default is 32).
+        max_queued_batches (int, optional): Batches decoded ahead of the consumer (default is 4).
+
+    Yields:
+        tuple: A list of PIL.Image frames (RGB) and the list of their frame indices.
+    """
+    batches = queue.Queue(maxsize=max_queued_batches)
+    stop = threading.Event()
+    end_of_stream = object()
+
+    def put(item):
+        # Gives up when the consumer has stopped reading so the thread never blocks forever
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def decode():
+        cap = cv2.VideoCapture(video_path)
+        frame_idx = 0
+        frames, indices = [], []
+        try:
+            while not stop.is_set():
+                # grab() skips decoding the pixels of frames that are not sampled
+                if not cap.grab():
+                    break
+                if frame_idx % sample_interval == 0:
+                    success, frame = cap.retrieve()
+                    if success:
+                        frames.append(Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
+                        indices.append(frame_idx)
+                    if len(frames) == batch_size:
+                        if not put((frames, indices)):
+                            return
+                        frames, indices = [], []
+                frame_idx += 1
+            if frames:
+                put((frames, indices))
+        except Exception as e:
+            logging.error(f"Error decoding frames from {video_path}: {e}")
+        finally:
+            cap.release()
+            put(end_of_stream)
+
+    decoder = threading.Thread(target=decode, name="frame-decoder", daemon=True)
+    decoder.start()
+
+    try:
+        while True:
+            item = batches.get()
+            if item is end_of_stream:
+                break
+            yield item
+    finally:
+        stop.set()
+        decoder.join()
+
 # Load Florence-2 model for vision-language tasks
 # !mkdir -p my_models # Ceates folder/directory named 'my_models'
 # ! mkdir my_models/Florence_2  # and sub folder Florence_2 where florence2 models can be saved (e.g., Florence-2-large)
 florence_models_dir = 'my_models/Florence_2'
-model_id = 'microsoft/Florence-2-large'
-
-# Load model and processor with GPU acceleration
-model = AutoModelForCausalLM.from_pretrained(
-    model_id,
-    cache_dir=florence_models_dir,
-    device_map="cuda",
-    trust_remote_code=True,
-    torch_dtype='auto'
-).eval().cuda()
-
-processor = AutoProcessor.from_pretrained(
-    model_id,
-    cache_dir=florence_models_dir,
-    trust_remote_code=True
-)
+FLORENCE2_MODELS = {
+    'base': 'microsoft/Florence-2-base',
+    'large': 'microsoft/Florence-2-large'
+}
+TORCH_DTYPES = {
+    'float32': torch.float32,
+    'bfloat16': torch.bfloat16,
+    'float16': torch.float16
+}
+
+class Florence2Runtime():
+    """
+    A loaded Florence-2 model and processor together with the device and dtype they run in.
+
+    Args:
+        model_size (str): 'base' (0.23B parameters) or 'large' (0.77B parameters).
+        device (str): 'cuda', 'cpu' or 'auto' to use CUDA when it is available.
+        dtype (str): 'float32', 'bfloat16', 'float16' or 'auto' (float16 on CUDA, float32 on CPU).
+        quantize (bool): Dynamically quantizes the Linear layers to INT8 (CPU only).
+        num_threads (int): Torch intra-op threads, None keeps torch's default.
+    """
+    def __init__(self, model_size='large', device='auto', dtype='auto', quantize=False, num_threads=None):
+        if device == 'auto':
+            device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        if dtype == 'auto':
+            dtype = 'float16' if device == 'cuda' else 'float32'
+        if device == 'cpu' and dtype == 'float16':
+            logging.warning("float16 is not supported for Florence-2 on CPU, using float32")
+            dtype = 'float32'
+        if quantize and device != 'cpu':
+            logging.warning("Dynamic INT8 quantization only runs on CPU, loading without it")
+            quantize = False
+        if quantize and dtype != 'float32':
+            # Dynamic quantization converts float32 Linear layers
+            logging.warning(f"Dynamic INT8 quantization needs float32 weights, loading float32 instead of {dtype}")
+            dtype = 'float32'
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.model_id = FLORENCE2_MODELS[model_size]
+        self.device = device
+        self.dtype = TORCH_DTYPES[dtype]
+        self.quantized = quantize
+
+        start_time = time.perf_counter()
+        model = AutoModelForCausalLM.from_pretrained(
+            self.model_id,
+            cache_dir=florence_models_dir,
+            trust_remote_code=True,
+            torch_dtype=self.dtype
+        ).eval().to(device)
+        if quantize:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+
+        self.processor = AutoProcessor.from_pretrained(
+            self.model_id,
+            cache_dir=florence_models_dir,
+            trust_remote_code=True
+        )
+        self.load_time = time.perf_counter() - start_time
+        logging.info(f"Loaded Florence-2 {self.get_JSON()}")
+
+    def get_model(self):
+        return self.model
+
+    def get_processor(self):
+        return self.processor
+
+    def get_JSON(self):
+        return {
+            "model_id": self.model_id,
+            "device": self.device,
+            "dtype": str(self.dtype).replace("torch.", ""),
+            "quantized": self.quantized,
+            "num_threads": torch.get_num_threads(),
+            "load_time": round(self.load_time, 2)
+        }
+
+# The configured runtime is loaded on first use instead of at import
+_florence2 = None
+_florence2_lock = threading.Lock()
+
+def get_florence2():
+    global _florence2
+    with _florence2_lock:
+        if _florence2 is None:
+            _florence2 = Florence2Runtime(
+                model_size=settings.florence2_model,
+                device=settings.florence2_device,
+                dtype=settings.florence2_dtype,
+                quantize=settings.florence2_quantize,
+                num_threads=settings.torch_threads
+            )
+        return _florence2
+
+def run_florence2_inference_batch(images, task_prompt, text_input=None, num_beams=3, max_new_tokens=1024, runtime=None):
+    """
+    Runs multimodal inference on a batch of images with a single Florence-2 generate call.
+    The prompts are padded into one batch with the images, which amortizes the per-call
+    overhead of the processor and generate over all frames.
+
+    Args:
+        images (list of PIL.Image): The input images to run inference on.
+        task_prompt (str): The task prompt that specifies the type of inference (e.g., "<CAPTION>" for captioning).
+        text_input (str, optional): Additional text input to be appended to the task prompt (default is None).
+        num_beams (int, optional): Beam search width (default is 3).
+        max_new_tokens (int, optional): Maximum number of generated tokens per image (default is 1024).
+        runtime (Florence2Runtime, optional): Runtime to use, defaults to the configured one from get_florence2.
+
+    Returns:
+        list of dict: One parsed answer per image, in the same format as run_florence2_inference.
+    """
+    if not images:
+        return []
+
+    prompt = task_prompt if text_input is None else task_prompt + text_input
+
+    runtime = runtime or get_florence2()
+    model, processor = runtime.get_model(), runtime.get_processor()
+
+    # Only floating point inputs (pixel values) are cast to the runtime's dtype
+    inputs = processor(text=[prompt] * len(images), images=images, return_tensors="pt", padding=True).to(runtime.device, runtime.dtype)
+    with torch.inference_mode():
+        generated_ids = model.generate(
+            input_ids=inputs["input_ids"],
+            pixel_values=inputs["pixel_values"],
+            max_new_tokens=max_new_tokens,
+            early_stopping=False,
+            do_sample=False,
+            num_beams=num_beams,
+        )
+    generated_texts = processor.batch_decode(generated_ids, skip_special_tokens=False)
+    return [
+        processor.post_process_generation(
+            generated_text,
+            task=task_prompt,
+            image_size=(image.width, image.height)
+        )
+        for generated_text, image in zip(generated_texts, images)
+    ]
 
 def run_florence2_inference(image, task_prompt, text_input=None):
     """
@@ -237,24 +434,77 @@ def run_florence2_inference(image, task_prompt, text_input=None):
         dict: A dictionary containing the results of the inference, where keys correspond to
               task prompts and values are the corresponding model outputs.
     """
-    prompt = task_prompt if text_input is None else task_prompt + text_input
+    return run_florence2_inference_batch([image], task_prompt, text_input)[0]
 
-    inputs = processor(text=prompt, images=image, return_tensors="pt").to('cuda', torch.float16)
-    generated_ids = model.generate(
-        input_ids=inputs["input_ids"].cuda(),
-        pixel_values=inputs["pixel_values"].cuda(),
-        max_new_tokens=1024,
-        early_stopping=False,
-        do_sample=False,
-        num_beams=3,
-    )
-    generated_text = processor.batch_decode(generated_ids, skip_special_tokens=False)[0]
-    parsed_answer = processor.post_process_generation(
-        generated_text,
-        task=task_prompt,
-        image_size=(image.width, image.height)
-    )
-    return parsed_answer
+def benchmark_florence2_batch_sizes(images, task_prompt='<CAPTION>', batch_sizes=(1, 2, 4, 8, 16), num_beams=3, max_new_tokens=1024):
+    """
+    Measures captioning throughput of run_florence2_inference_batch for each batch size.
+    A warm-up call runs first so model initialization is not counted.
+
+    Args:
+        images (list of PIL.Image): Frames to caption with every batch size.
+        task_prompt (str, optional): Task prompt to benchmark (default is "<CAPTION>").
+        batch_sizes (tuple of int, optional): Batch sizes to compare.
+
+    Returns:
+        list of dict: Batch size, total seconds and frames per second of each run.
+    """
+    run_florence2_inference_batch(images[:1], task_prompt, num_beams=num_beams, max_new_tokens=max_new_tokens)
+    results = []
+
+    for batch_size in batch_sizes:
+        start_time = time.perf_counter()
+        for batch_start in range(0, len(images), batch_size):
+            run_florence2_inference_batch(images[batch_start:batch_start + batch_size], task_prompt, num_beams=num_beams, max_new_tokens=max_new_tokens)
+        elapsed = time.perf_counter() - start_time
+
+        result = {
+            "batch_size": batch_size,
+            "seconds": round(elapsed, 3),
+            "frames_per_second": round(len(images) / elapsed, 3) if elapsed else None
+        }
+        logging.info(f"Florence-2 batch benchmark {result}")
+        results.append(result)
+
+    return results
+
+def benchmark_florence2_configs(images, configs, task_prompt='<CAPTION>', batch_size=4, num_beams=3, max_new_tokens=1024):
+    """
+    Loads Florence-2 with each configuration and measures captioning frames per second,
+    e.g. to compare base and large, float32 and bfloat16, or INT8 quantization on CPU workers.
+
+    Args:
+        images (list of PIL.Image): Frames to caption with every configuration.
+        configs (list of dict): Florence2Runtime keyword arguments, e.g.
+                                {'model_size': 'base', 'device': 'cpu', 'quantize': True, 'num_threads': 8}.
+        task_prompt (str, optional): Task prompt to benchmark (default is "<CAPTION>").
+        batch_size (int, optional): Frames per generate call (default is 4).
+
+    Returns:
+        list of dict: Runtime details, total seconds and frames per second of each configuration.
+    """
+    results = []
+
+    for config in configs:
+        runtime = Florence2Runtime(**config)
+        run_florence2_inference_batch(images[:1], task_prompt, num_beams=num_beams, max_new_tokens=max_new_tokens, runtime=runtime)
+
+        start_time = time.perf_counter()
+        for batch_start in range(0, len(images), batch_size):
+            run_florence2_inference_batch(images[batch_start:batch_start + batch_size], task_prompt, num_beams=num_beams, max_new_tokens=max_new_tokens, runtime=runtime)
+        elapsed = time.perf_counter() - start_time
+
+        result = {
+            **runtime.get_JSON(),
+            "batch_size": batch_size,
+            "seconds": round(elapsed, 3),
+            "frames_per_second": round(len(images) / elapsed, 3) if elapsed else None
+        }
+        logging.info(f"Florence-2 config benchmark {result}")
+        results.append(result)
+        del runtime
+
+    return results
 
 def clean_text(text):
     """
@@ -435,7 +685,7 @@ def draw_polygons(image, prediction, fill_mask=False):
 
 def find_object_segments(video_path, frames_batches, frame_indices_batches, user_text_input,
                          detail_level='high', thresholds=np.array([85, 90, 95], dtype=np.float32),
-                         plot_matching_frames=False):  
+                         plot_matching_frames=False, interactive=True, caption_batch_size=8):  
     """
     Finds the start and end timestamps of segments in the video that match the user's input text/prompt based on
     image captions. The function performs inference on each frame and compares the caption text with the
@@ -444,12 +694,16 @@ def find_object_segments(video_path, frames_batches, frame_indices_batches, user
     Args:
         video_path (str): The path to the input video file. This is used to extract timestamps for the segments.
         frames_batches (list of lists of PIL.Images): A list of lists video frames to process, extracted from the video.
-        frame_indices_batches (list of lists of ints): A list of lists of indices corresponding to the video frames.
+                                                      When frame_indices_batches is None, an iterable of (frames, indices)
+                                                      batches instead, e.g. from stream_frames_and_indices.
+        frame_indices_batches (list of lists of ints): A list of lists of indices corresponding to the video frames, or None.
         user_text_input (str): The user's input text or prompt to match against the captions of each frame.
         detail_level (str, optional): Level of detail for inference ('high', 'medium', 'low'). Default is 'high'.
         thresholds (np.ndarray, optional): Match percentage thresholds in the order:
                                            [<CAPTION>, <DETAILED_CAPTION>, <MORE_DETAILED_CAPTION>]. Default is [85., 90., 95.].
         plot_matching_frames (bool, optional): If True, displays bounding boxes on the start and end matching frames.
+        interactive (bool, optional): If True, asks whether to keep searching after each segment. Default is True.
+        caption_batch_size (int, optional): Frames captioned per generate call. Default is 8.
     Returns:
         list of dict: List of dictionaries with 'start', 'end' timestamps.
     """
@@ -467,20 +721,34 @@ def find_object_segments(video_path, frames_batches, frame_indices_batches, user
     }
 
     segments = []
+    segment_visuals = []
     match_started = False
+    end_index = None
     current_detail_level = detail_level
     batch_num = 0
 
-    progress_bar = tqdm(total=len(frames_batches), unit=" batches", desc=f'Running inference on {len(frames_batches)} batches of frames')
+    # Streamed batches arrive as (frames, indices) pairs and their count is unknown upfront
+    if frame_indices_batches is None:
+        batches = frames_batches
+        total_batches = None
+    else:
+        batches = zip(frames_batches, frame_indices_batches)
+        total_batches = len(frames_batches)
+
+    progress_bar = tqdm(total=total_batches, unit=" batches", desc='Running inference on batches of frames')
 
-    for batch_frames_list, batch_indices_list in zip(frames_batches, frame_indices_batches):
+    for batch_frames_list, batch_indices_list in batches:
         try:
-            for frame, index in tqdm(zip(batch_frames_list, batch_indices_list), desc=f' Batch no. {batch_num}', total=len(batch_frames_list)):
+            # Frames are captioned caption_batch_size at a time, one generate call per chunk
+            captions = []
+            caption_levels = []
+            for chunk_start in tqdm(range(0, len(batch_frames_list), caption_batch_size), desc=f' Batch no. {batch_num}'):
+                chunk = batch_frames_list[chunk_start:chunk_start + caption_batch_size]
                 task_prompt = task_prompts[current_detail_level]
 
                 start_time = time.time()
-                results = run_florence2_inference(frame, task_prompt)
-                inference_time = time.time() - start_time
+                results = run_florence2_inference_batch(chunk, task_prompt)
+                inference_time = (time.time() - start_time) / len(chunk)
 
                 if current_detail_level == 'high' and inference_time > 1:
                     print(f" Inference is slow with high detail level ({inference_time:.2f}s/frame), switching to medium...")
@@ -489,10 +757,13 @@ def find_object_segments(video_path, frames_batches, frame_indices_batches, user
                     print(f" Still slow with medium detail level ({inference_time:.2f}s/frame), switching to low...")
                     current_detail_level = 'low'
 
-                caption_text_input = results[task_prompt]
+                captions.extend(result[task_prompt] for result in results)
+                caption_levels.extend([current_detail_level] * len(chunk))
+
+            for frame, index, caption_text_input, caption_level in zip(batch_frames_list, batch_indices_list, captions, caption_levels):
                 match_percent = compare_texts(user_text_input, caption_text_input)
 
-                if match_percent is not None and match_percent >= thresholds_dict[current_detail_level]:
+                if match_percent is not None and match_percent >= thresholds_dict[caption_level]:
                     if not match_started:
                         start_index = index
                         start_frame = frame
@@ -525,8 +796,7 @@ def find_object_segments(video_path, frames_batches, frame_indices_batches, user
                       plot_bbox(end_frame, end_results['<CAPTION_TO_PHRASE_GROUNDING>'])
 
                     match_started = False
-                    user_input = input(" Do you want to continue finding more segments? (yes/no): ")
-                    if user_input.lower() != 'yes':
+                    if interactive and input(" Do you want to continue finding more segments? (yes/no): ").lower() != 'yes':
                         progress_bar.update(len(batch_frames_list))
                         progress_bar.close()
                         print(f"Inference ended at frame no. {end_index}, batch {batch_num}")
@@ -537,7 +807,7 @@ def find_object_segments(video_path, frames_batches, frame_indices_batches, user
             print(f" Error during inference: {e}")
 
         finally:
-            progress_bar.update(len(frames_batches))
+            progress_bar.update(1)
         batch_num += 1
 
     progress_bar.close()
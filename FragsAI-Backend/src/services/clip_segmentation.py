@@ -6,14 +6,18 @@ import moviepy.editor as mp
 import logging
 from tqdm import tqdm
 from models.job_manager import Job
+from .renditions import SOURCE_RENDITION, render_renditions
+from .proxy import get_analysis_source
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def detect_motion(video_path, job: Job, segment_duration=60, fps_threshold=10):
-    cap = cv2.VideoCapture(video_path)
+    # Motion is measured on the analysis proxy when ingest created one (PROXY_UPLOADS).
+    # The proxy's lower fps widens the gap between compared frames, so scores run higher than on the source.
+    cap = cv2.VideoCapture(get_analysis_source(video_path))
     fps = cap.get(cv2.CAP_PROP_FPS)
-    frame_skip = int(fps / fps_threshold)
+    frame_skip = max(1, int(fps / fps_threshold))
 
     prev_frame = None
     motion_scores = {}
@@ -52,17 +56,24 @@ def detect_motion(video_path, job: Job, segment_duration=60, fps_threshold=10):
     cap.release()
     return motion_scores
 
-def segment_video_and_audio(video_path, output_dir, job: Job, segment_duration=60, max_segments=30):
+def segment_video_and_audio(video_path, output_dir, job: Job, segment_duration=60, max_segments=30, on_segment=None, renditions=None):
+    """
+    Exports the most action-rich segments of a video.
+    When renditions (RenditionSpec list) are given, they are exported to output_dir/renditions
+    from the same decode as the segment itself, so they are not uploaded as clips.
+    Returns:
+        list: (clip path, start, end) of each exported clip, times in seconds of the source video.
+    """
     if not os.path.exists(video_path):
         logging.error(f"Video file {video_path} not found.")
-        return
+        return []
 
     video_filename = os.path.splitext(os.path.basename(video_path))[0]
     cap = cv2.VideoCapture(video_path)
 
     if not cap.isOpened():
         logging.error("Failed to open video file.")
-        return
+        return []
 
     fps = cap.get(cv2.CAP_PROP_FPS)
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
@@ -70,7 +81,7 @@ def segment_video_and_audio(video_path, output_dir, job: Job, segment_duration=6
     if fps == 0 or total_frames == 0:
         logging.error("Invalid video file or unreadable metadata.")
         cap.release()
-        return
+        return []
 
     duration = total_frames / fps
     total_segments = int(duration // segment_duration)
@@ -78,14 +89,14 @@ def segment_video_and_audio(video_path, output_dir, job: Job, segment_duration=6
     if total_segments == 0:
         logging.warning("Video too short to segment. Skipping.")
         cap.release()
-        return
+        return []
 
     motion_scores = detect_motion(video_path, job, segment_duration)
 
     if not motion_scores:
         logging.warning("No motion detected in any segments. Exiting.")
         cap.release()
-        return
+        return []
 
     # Sort segments by motion detected (most to least motion)
     sorted_segments = sorted(motion_scores.items(), key=lambda x: x[1], reverse=True)
@@ -98,6 +109,7 @@ def segment_video_and_audio(video_path, output_dir, job: Job, segment_duration=6
 
     logging.info(f"Processing {len(selected_segments)} action-rich segments.")
 
+    segments = []
     segment_count = 0
     for seg_index in selected_segments:
         job.set_video_progress(round(segment_count / len(selected_segments) * 100))
@@ -105,7 +117,13 @@ def segment_video_and_audio(video_path, output_dir, job: Job, segment_duration=6
         output_video_path = os.path.join(video_output_dir, f"{video_filename}_segment_{segment_count + 1}.mp4")
         output_audio_path = os.path.join(audio_output_dir, f"{video_filename}_segment_{segment_count + 1}.mp3")
 
-        ffmpeg.input(video_path, ss=start_time, t=segment_duration).output(output_video_path, vcodec="libx264", acodec="aac").run(overwrite_output=True)
+        if renditions:
+            render_renditions(
+                video_path, os.path.join(output_dir, "renditions"), f"{video_filename}_segment_{segment_count + 1}",
+                start_time, segment_duration, [SOURCE_RENDITION] + list(renditions), source_dir=video_output_dir
+            )
+        else:
+            ffmpeg.input(video_path, ss=start_time, t=segment_duration).output(output_video_path, vcodec="libx264", acodec="aac").run(overwrite_output=True)
 
         video_clip = mp.VideoFileClip(output_video_path)
         video_clip.audio.write_audiofile(output_audio_path, codec="mp3")
@@ -113,9 +131,14 @@ def segment_video_and_audio(video_path, output_dir, job: Job, segment_duration=6
         logging.info(f"Saved segment {segment_count + 1}: {output_video_path}")
 
         video_clip.close()
+        segments.append((output_video_path, start_time, min(start_time + segment_duration, duration)))
+
+        # Lets callers start scoring a clip while the next one is being exported
+        if on_segment is not None:
+            on_segment(output_video_path)
         segment_count += 1
 
     cap.release()
     logging.info(f"Completed video segmentation. Total segments created: {segment_count}")
     job.set_video_progress(100)
-    job.set_status("completed")
\ No newline at end of file
+    return segments
\ No newline at end of file
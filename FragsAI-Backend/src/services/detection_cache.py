@@ -0,0 +1,107 @@
+import os
+import hashlib
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from config import settings
+from models.detections import DETECTION_DTYPE
+
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Content hashes keyed by (path, size, mtime) so a clip is only read once per process,
+# bounded like the detection LRU so a long-running server doesn't keep every path it has seen
+_content_hashes: OrderedDict[tuple, str] = OrderedDict()
+_content_hashes_lock = threading.Lock()
+
+def content_hash(video_path: str):
+    """
+    Hashes the bytes of a video so identical clips share cache entries regardless of their path.
+    """
+    stat = os.stat(video_path)
+    key = (os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns)
+    with _content_hashes_lock:
+        if key in _content_hashes:
+            _content_hashes.move_to_end(key)
+            return _content_hashes[key]
+
+    digest = hashlib.sha1()
+    with open(video_path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+
+    with _content_hashes_lock:
+        _content_hashes[key] = digest.hexdigest()
+        _content_hashes.move_to_end(key)
+        while len(_content_hashes) > settings.detection_cache_size:
+            _content_hashes.popitem(last=False)
+    return digest.hexdigest()
+
+class DetectionCache():
+    """
+    Per-frame detections for a clip, keyed by content hash, model version and sampling rate.
+    Entries live on disk as compressed npz files with an in-memory LRU in front of them.
+    """
+    def __init__(self, cache_dir: str, max_entries: int = 256):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self.lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_key(self, video_path: str, model_version: str, frame_rate):
+        return f"{content_hash(video_path)}_{model_version}_{frame_rate}"
+
+    def get_path(self, key: str):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _remember(self, key: str, detections: np.ndarray):
+        with self.lock:
+            self.entries[key] = detections
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get(self, video_path: str, model_version: str, frame_rate):
+        key = self.get_key(video_path, model_version, frame_rate)
+        with self.lock:
+            detections = self.entries.get(key)
+            if detections is not None:
+                self.entries.move_to_end(key)
+
+        if detections is None:
+            path = self.get_path(key)
+            if not os.path.exists(path):
+                return None
+            try:
+                with np.load(path) as data:
+                    detections = data["detections"]
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning(f"Discarding unreadable detection cache entry {path}: {e}")
+                os.remove(path)
+                return None
+            if detections.dtype != DETECTION_DTYPE:
+                logging.warning(f"Discarding detection cache entry {path} with an outdated layout")
+                os.remove(path)
+                return None
+            self._remember(key, detections)
+
+        return detections
+
+    def put(self, video_path: str, model_version: str, frame_rate, detections: np.ndarray):
+        key = self.get_key(video_path, model_version, frame_rate)
+
+        # Write to a temporary file first so concurrent readers never see a partial entry.
+        # Thread ids repeat across the ranking pool's processes, so the pid is part of the name.
+        path = self.get_path(key)
+        temp_path = f"{path[:-len('.npz')]}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez_compressed(temp_path, detections=detections)
+        os.replace(temp_path, path)
+
+        self._remember(key, detections)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+detection_cache = DetectionCache(settings.detection_cache_folder, settings.detection_cache_size)
@@ -0,0 +1,50 @@
+import os
+import logging
+import ffmpeg
+from concurrent.futures import ThreadPoolExecutor
+from config import settings
+
+class EncodeScheduler():
+    """
+    Runs ffmpeg encodes in parallel on a fixed number of workers.
+    Each encode is capped to its share of the CPU cores so parallel encodes don't oversubscribe the machine.
+    """
+    def __init__(self, max_workers: int = None, threads_per_encode: int = None):
+        cpu_count = os.cpu_count() or 1
+        self.max_workers = max_workers or max(1, cpu_count // 4)
+        self.threads_per_encode = threads_per_encode or max(1, cpu_count // self.max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="encode")
+
+    def get_threads(self):
+        return self.threads_per_encode
+
+    def get_output_args(self):
+        """
+        Output options that keep an encode within its share of the cores.
+        """
+        return {"threads": self.threads_per_encode}
+
+    def run(self, stream):
+        """
+        Runs an ffmpeg-python output stream and raises with ffmpeg's stderr if it fails.
+        """
+        try:
+            stream.run(overwrite_output=True, capture_stdout=True, capture_stderr=True)
+        except ffmpeg.Error as e:
+            logging.error(f"Encode failed: {e.stderr.decode(errors='ignore') if e.stderr else e}")
+            raise
+
+    def submit(self, fn, *args, **kwargs):
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def map(self, fn, *iterables):
+        """
+        Runs fn over the iterables on the encode workers and returns the results in order.
+        """
+        futures = [self.executor.submit(fn, *args) for args in zip(*iterables)]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+encode_scheduler = EncodeScheduler(settings.encode_workers, settings.encode_threads)
@@ -0,0 +1,97 @@
+import os
+import av
+import cv2
+import threading
+import numpy as np
+
+class KeyframeIndex():
+    """
+    Keyframe timestamps of a video's first video stream, built by demuxing packets without decoding them.
+    """
+    def __init__(self, video_path: str):
+        keyframes = []
+        start_pts, end_pts = None, None
+
+        with av.open(video_path) as container:
+            stream = container.streams.video[0]
+            self.time_base = stream.time_base
+            for packet in container.demux(stream):
+                if packet.pts is None:
+                    continue
+                start_pts = packet.pts if start_pts is None else min(start_pts, packet.pts)
+                end_pts = packet.pts if end_pts is None else max(end_pts, packet.pts)
+                if packet.is_keyframe:
+                    keyframes.append(packet.pts)
+
+        self.keyframes = np.array(sorted(keyframes), dtype=np.int64)
+        self.start_pts = start_pts or 0
+        self.end_pts = end_pts or 0
+
+    def keyframe_before(self, pts: int):
+        idx = np.searchsorted(self.keyframes, pts, side="right") - 1
+        return int(self.keyframes[max(idx, 0)]) if len(self.keyframes) else self.start_pts
+
+    def uniform_targets(self, count: int):
+        # Targets sit in the middle of count equal slices of the clip
+        span = self.end_pts - self.start_pts
+        return [int(self.start_pts + (i + 0.5) * span / count) for i in range(count)]
+
+# Indexes are reused until the file changes
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_keyframe_index(video_path: str):
+    stat = os.stat(video_path)
+    key = (os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = KeyframeIndex(video_path)
+        return _indexes[key]
+
+def sample_frames(video_path: str, count: int, size: tuple[int, int]):
+    """
+    Samples count frames spread evenly across a video.
+    Each target is reached by seeking to the nearest keyframe before it and decoding forward,
+    and targets inside an already decoded stretch are reached without seeking again.
+    Args:
+        video_path (str): Path to the video file.
+        count (int): Number of frames to return.
+        size (tuple): Output (width, height) of each frame.
+    Returns:
+        np.ndarray: (count, height, width, 3) uint8 BGR frames. Missing frames at the end
+                    repeat the last decoded frame, an unreadable video returns no frames.
+    """
+    index = get_keyframe_index(video_path)
+    frames = []
+
+    with av.open(video_path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        decoder = None
+        last_frame = None
+
+        for target in index.uniform_targets(count):
+            keyframe = index.keyframe_before(target)
+            if decoder is None or (last_frame is not None and keyframe > last_frame.pts):
+                container.seek(keyframe, stream=stream, backward=True, any_frame=False)
+                decoder = container.decode(stream)
+                last_frame = None
+
+            while last_frame is None or last_frame.pts < target:
+                frame = next(decoder, None)
+                if frame is None:
+                    break
+                if frame.pts is not None:
+                    last_frame = frame
+
+            if last_frame is None:
+                break
+            frames.append(cv2.resize(last_frame.to_ndarray(format="bgr24"), size))
+
+    if not frames:
+        return np.empty((0, size[1], size[0], 3), dtype=np.uint8)
+
+    while len(frames) < count:
+        frames.append(frames[-1])
+
+    return np.stack(frames)
@@ -0,0 +1,72 @@
+import os
+import ffmpeg
+import hashlib
+import logging
+import threading
+from config import settings
+from .encoder import encode_scheduler
+
+def get_proxy_path(video_path: str):
+    """
+    Proxies are keyed by the source's path, size and mtime, so a lookup never reads the video,
+    two uploads with the same file name don't share one and a replaced upload gets a new one.
+    """
+    stat = os.stat(video_path)
+    key = hashlib.sha1(f"{os.path.abspath(video_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()
+    return os.path.join(settings.upload_folder, "proxies", f"{key}_proxy.mp4")
+
+def has_proxy(video_path: str):
+    return os.path.exists(get_proxy_path(video_path))
+
+def create_proxy(video_path: str, height: int = None, fps: int = None):
+    """
+    Encodes a low-resolution, low-fps analysis proxy of a video once at ingest.
+    The proxy has no audio and a keyframe every second, so analyzers can seek cheaply.
+    Returns:
+        str: Path to the proxy, or None if it could not be created.
+    """
+    height = height or settings.proxy_height
+    fps = fps or settings.proxy_fps
+    proxy_path = get_proxy_path(video_path)
+    if has_proxy(video_path):
+        return proxy_path
+
+    os.makedirs(os.path.dirname(proxy_path), exist_ok=True)
+    temp_path = f"{proxy_path[:-len('.mp4')]}.{os.getpid()}.{threading.get_ident()}.tmp.mp4"
+
+    try:
+        stream = (
+            ffmpeg.input(video_path)
+            .filter("fps", fps)
+            .filter("scale", -2, f"min(ih,{height})")
+            .output(
+                temp_path, vcodec="libx264", preset="ultrafast", crf=28, g=fps,
+                pix_fmt="yuv420p", an=None, **encode_scheduler.get_output_args()
+            )
+        )
+        encode_scheduler.run(stream)
+        os.replace(temp_path, proxy_path)
+    except Exception as e:
+        logging.error(f"Error creating analysis proxy for {video_path}: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return None
+
+    logging.info(f"Created analysis proxy {proxy_path}")
+    return proxy_path
+
+def remove_proxy(video_path: str):
+    """
+    Deletes the proxy of a video once its job is done with it.
+    """
+    proxy_path = get_proxy_path(video_path)
+    if os.path.exists(proxy_path):
+        os.remove(proxy_path)
+        logging.info(f"Removed analysis proxy {proxy_path}")
+
+def get_analysis_source(video_path: str):
+    """
+    Returns the file analyzers should decode: the proxy when one exists, otherwise the video itself.
+    Final cuts always read the original video.
+    """
+    return get_proxy_path(video_path) if has_proxy(video_path) else video_path
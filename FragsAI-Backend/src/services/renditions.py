@@ -0,0 +1,115 @@
+import os
+import ffmpeg
+import logging
+from .aspect_ratio import build_aspect_ratio_filter
+from .encoder import encode_scheduler
+
+class RenditionSpec():
+    """
+    One output of a clip export.
+    Args:
+        name (str): Suffix added to the output file name, empty for the base clip.
+        width (int): Output width, None keeps the source size.
+        height (int): Output height, None keeps the source size.
+        mode (str): "pad" or "crop", see build_aspect_ratio_filter.
+        kind (str): "video" for an encoded clip, "thumbnail" for a single JPEG still.
+        time (float): Thumbnail time in seconds from the start of the clip, None for the middle.
+    """
+    def __init__(self, name: str, width: int = None, height: int = None, mode: str = "pad", kind: str = "video", time: float = None):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.kind = kind
+        self.time = time
+
+    def get_output_path(self, output_dir: str, base_name: str):
+        extension = "jpg" if self.kind == "thumbnail" else "mp4"
+        suffix = f"_{self.name}" if self.name else ""
+        return os.path.join(output_dir, f"{base_name}{suffix}.{extension}")
+
+    def get_JSON(self):
+        return {
+            "name": self.name,
+            "width": self.width,
+            "height": self.height,
+            "mode": self.mode,
+            "kind": self.kind,
+            "time": self.time
+        }
+
+SOURCE_RENDITION = RenditionSpec("")
+
+DEFAULT_RENDITIONS = [
+    RenditionSpec("landscape", 1920, 1080, "pad"),
+    RenditionSpec("vertical", 720, 1280, "pad"),
+    RenditionSpec("square", 1080, 1080, "crop"),
+    RenditionSpec("thumbnail", 1280, 720, "crop", kind="thumbnail"),
+]
+
+def render_renditions(video_path: str, output_dir: str, base_name: str, start: float = 0, duration: float = None, renditions: list = None, preset: str = None, source_dir: str = None):
+    """
+    Exports every rendition of a clip range from a single decode.
+    The decoded frames are split once in the filtergraph and each branch is scaled and encoded
+    to its own output, so a clip is decoded once no matter how many renditions it has.
+    Args:
+        video_path (str): Path to the source video.
+        output_dir (str): Folder the renditions are written to.
+        base_name (str): Output file name without extension, each rendition adds its suffix.
+        start (float): Start of the clip in the source, in seconds.
+        duration (float): Length of the clip in seconds, None for the rest of the source.
+        renditions (list): RenditionSpec list, defaults to DEFAULT_RENDITIONS.
+        preset (str): libx264 preset for the video renditions, None for ffmpeg's default.
+        source_dir (str): Folder for the unnamed source rendition, defaults to output_dir.
+    Returns:
+        dict: Rendition name to output path.
+    """
+    renditions = renditions or DEFAULT_RENDITIONS
+    source_dir = source_dir or output_dir
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs(source_dir, exist_ok=True)
+
+    if duration is None:
+        duration = float(ffmpeg.probe(video_path)["format"]["duration"]) - start
+
+    input_args = {"ss": start, "t": duration} if start else {"t": duration}
+    source = ffmpeg.input(video_path, **input_args)
+    branches = source.video.filter_multi_output("split", len(renditions))
+    encode_args = encode_scheduler.get_output_args()
+    if preset:
+        encode_args["preset"] = preset
+
+    outputs = []
+    paths = {}
+    for i, spec in enumerate(renditions):
+        branch = branches[i]
+        output_path = spec.get_output_path(source_dir if not spec.name else output_dir, base_name)
+        paths[spec.name] = output_path
+
+        if spec.kind == "thumbnail":
+            time = spec.time if spec.time is not None else duration / 2
+            branch = branch.filter("select", f"gte(t,{min(time, max(duration - 0.1, 0)):.3f})")
+            if spec.width and spec.height:
+                branch = build_aspect_ratio_filter(branch, spec.width, spec.height, spec.mode)
+            outputs.append(ffmpeg.output(branch, output_path, vframes=1, **{"q:v": 2}))
+        else:
+            if spec.width and spec.height:
+                branch = build_aspect_ratio_filter(branch, spec.width, spec.height, spec.mode)
+            outputs.append(ffmpeg.output(branch, output_path, vcodec="libx264", acodec="aac", map="0:a?", **encode_args))
+
+    encode_scheduler.run(ffmpeg.merge_outputs(*outputs))
+    logging.info(f"Rendered {len(outputs)} renditions of {video_path} [{start}s, {start + duration}s] from one decode")
+    return paths
+
+def render_clips_renditions(video_path: str, output_dir: str, clips: list, renditions: list = None, preset: str = None):
+    """
+    Renders the renditions of several clip ranges of a source in parallel.
+    Args:
+        clips (list): (base name, start, duration) of each clip.
+    Returns:
+        list: Rendition paths of each clip in order.
+    """
+    return encode_scheduler.map(
+        lambda base_name, start, duration: render_renditions(video_path, output_dir, base_name, start, duration, renditions, preset),
+        *zip(*clips)
+    )
@@ -0,0 +1,48 @@
+# Per-game regions of interest for HUD elements that appear in fixed screen positions.
+# Regions are (x, y, width, height) as fractions of the frame so they work at any resolution.
+# Each region lists the labels it is allowed to produce, detections of other labels are dropped.
+
+KILL_FEED_LABELS = ["multiple_kills", "headshot", "sniper_shot", "knife_attack", "death"]
+BANNER_LABELS = ["multiple_kills", "headshot", "explosion", "capture_flag"]
+
+ROI_PROFILES = {
+    "valorant": [
+        {"name": "kill_feed", "region": (0.72, 0.06, 0.27, 0.22), "labels": KILL_FEED_LABELS},
+        {"name": "kill_banner", "region": (0.38, 0.70, 0.24, 0.18), "labels": BANNER_LABELS},
+    ],
+    "cs2": [
+        {"name": "kill_feed", "region": (0.70, 0.04, 0.29, 0.20), "labels": KILL_FEED_LABELS},
+        {"name": "round_banner", "region": (0.30, 0.12, 0.40, 0.12), "labels": BANNER_LABELS},
+    ],
+    "apex": [
+        {"name": "kill_feed", "region": (0.70, 0.02, 0.29, 0.18), "labels": KILL_FEED_LABELS},
+        {"name": "damage_banner", "region": (0.35, 0.60, 0.30, 0.15), "labels": BANNER_LABELS},
+    ],
+    "fortnite": [
+        {"name": "kill_feed", "region": (0.01, 0.55, 0.30, 0.20), "labels": KILL_FEED_LABELS},
+        {"name": "elimination_banner", "region": (0.35, 0.62, 0.30, 0.12), "labels": BANNER_LABELS},
+    ],
+    "call_of_duty": [
+        {"name": "kill_feed", "region": (0.01, 0.60, 0.30, 0.18), "labels": KILL_FEED_LABELS},
+        {"name": "medal_banner", "region": (0.38, 0.25, 0.24, 0.20), "labels": BANNER_LABELS},
+    ],
+}
+
+def get_roi_profile(game: str):
+    """
+    Returns the ROI profile for a game, or None if the game has no profile.
+    """
+    if game is None:
+        return None
+    return ROI_PROFILES.get(game.lower())
+
+def get_region_box(region: tuple, width: int, height: int):
+    """
+    Converts a fractional region into a pixel box (x, y, w, h) clamped to the frame.
+    """
+    rx, ry, rw, rh = region
+    x = max(0, int(rx * width))
+    y = max(0, int(ry * height))
+    w = min(width - x, int(rw * width))
+    h = min(height - y, int(rh * height))
+    return x, y, w, h
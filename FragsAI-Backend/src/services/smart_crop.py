@@ -0,0 +1,231 @@
+import os
+import cv2
+import ffmpeg
+import logging
+import numpy as np
+from .action_detection import extract_detections
+from .encoder import encode_scheduler
+
+# Analysis runs on a small grayscale proxy decoded by ffmpeg, never on full-resolution frames
+ANALYSIS_WIDTH = 320
+ANALYSIS_FPS = 4
+
+# Relative pull of each signal on the crop center
+MOTION_WEIGHT = 1.0
+DETECTION_WEIGHT = 2.0
+FACE_WEIGHT = 3.0
+
+# Trajectory smoothing and keyframing, in seconds
+SMOOTHING_WINDOW = 1.5
+KEYFRAME_INTERVAL = 0.5
+# Keyframes closer than this fraction of the frame width to the previous one are dropped
+KEYFRAME_TOLERANCE = 0.01
+
+_face_cascade = None
+
+def get_face_cascade():
+    global _face_cascade
+    if _face_cascade is None:
+        _face_cascade = cv2.CascadeClassifier(os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml"))
+    return _face_cascade
+
+def get_video_info(video_path: str):
+    video_stream = next(stream for stream in ffmpeg.probe(video_path)["streams"] if stream["codec_type"] == "video")
+    numerator, denominator = video_stream["avg_frame_rate"].split("/")
+    fps = float(numerator) / float(denominator) if float(denominator) else 0.0
+    return int(video_stream["width"]), int(video_stream["height"]), fps
+
+def iter_proxy_frames(video_path: str, width: int, height: int, fps=ANALYSIS_FPS):
+    """
+    Yields grayscale width x height frames sampled at fps, scaled and sampled inside ffmpeg.
+    """
+    process = (
+        ffmpeg.input(video_path)
+        .filter("fps", fps)
+        .filter("scale", width, height, flags="area")
+        .output("pipe:", format="rawvideo", pix_fmt="gray")
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stdout=True)
+    )
+    frame_bytes = width * height
+    try:
+        while True:
+            data = process.stdout.read(frame_bytes)
+            if len(data) < frame_bytes:
+                break
+            yield np.frombuffer(data, dtype=np.uint8).reshape(height, width)
+    finally:
+        process.stdout.close()
+        process.wait()
+
+def get_detection_signal(video_path: str, source_fps: float, source_width: int, sample_count: int, fps=ANALYSIS_FPS):
+    """
+    Confidence-weighted detection centers binned onto the analysis samples.
+    Returns per-sample sums of weight * center and of weight, centers as fractions of the width.
+    """
+    weighted_centers = np.zeros(sample_count, dtype=np.float64)
+    weights = np.zeros(sample_count, dtype=np.float64)
+    detections = extract_detections(video_path)
+    if not len(detections) or not source_fps:
+        return weighted_centers, weights
+
+    samples = np.clip(np.round(detections["frame"] / source_fps * fps).astype(np.int64), 0, sample_count - 1)
+    centers = (detections["box"][:, 0] + detections["box"][:, 2] / 2) / source_width
+    confidences = detections["confidence"].astype(np.float64)
+    np.add.at(weighted_centers, samples, confidences * centers)
+    np.add.at(weights, samples, confidences)
+    return weighted_centers, weights
+
+def smooth_trajectory(centers, fps=ANALYSIS_FPS, window=SMOOTHING_WINDOW):
+    """
+    Zero-phase moving average, so the crop follows the subject without lagging behind it.
+    """
+    size = max(1, int(round(window * fps)))
+    if size <= 1 or len(centers) < 2:
+        return centers
+    padded = np.pad(centers, (size // 2, size - 1 - size // 2), mode="edge")
+    return np.convolve(padded, np.ones(size) / size, mode="valid")
+
+def analyze_crop_trajectory(video_path: str, crop_fraction: float, use_detections=True, use_faces=True, fps=ANALYSIS_FPS):
+    """
+    Finds a smoothed horizontal crop-center trajectory for a video from its low-resolution proxy.
+    Every sample pulls the center towards motion energy, detected actions and faces (e.g. a webcam overlay).
+    Args:
+        video_path (str): Path to the video file.
+        crop_fraction (float): Width of the crop window as a fraction of the frame width.
+    Returns:
+        tuple: Sample times in seconds and crop centers as fractions of the frame width.
+    """
+    source_width, source_height, source_fps = get_video_info(video_path)
+    proxy_height = max(2, int(round(ANALYSIS_WIDTH * source_height / source_width / 2)) * 2)
+    columns = (np.arange(ANALYSIS_WIDTH) + 0.5) / ANALYSIS_WIDTH
+    face_cascade = get_face_cascade() if use_faces else None
+
+    motion_centers, motion_weights = [], []
+    face_centers, face_weights = [], []
+    previous = None
+
+    for frame in iter_proxy_frames(video_path, ANALYSIS_WIDTH, proxy_height, fps):
+        frame = cv2.GaussianBlur(frame, (5, 5), 0)
+
+        # Motion energy per column, its centroid is where the action is
+        if previous is not None:
+            energy = cv2.absdiff(frame, previous).sum(axis=0, dtype=np.float64)
+            total = energy.sum()
+            motion_centers.append(float(energy @ columns / total) if total else 0.5)
+            motion_weights.append(total / frame.size / 255.0)
+        else:
+            motion_centers.append(0.5)
+            motion_weights.append(0.0)
+        previous = frame
+
+        face_center, face_weight = 0.5, 0.0
+        if face_cascade is not None:
+            faces = face_cascade.detectMultiScale(frame, scaleFactor=1.2, minNeighbors=5, minSize=(16, 16))
+            if len(faces):
+                x, _, w, _ = max(faces, key=lambda face: face[2] * face[3])
+                face_center, face_weight = (x + w / 2) / ANALYSIS_WIDTH, 1.0
+        face_centers.append(face_center)
+        face_weights.append(face_weight)
+
+    sample_count = len(motion_centers)
+    if sample_count == 0:
+        return np.zeros(0), np.zeros(0)
+
+    motion_weights = np.asarray(motion_weights)
+    motion_weights = motion_weights / motion_weights.max() if motion_weights.max() > 0 else motion_weights
+
+    weighted = MOTION_WEIGHT * motion_weights * np.asarray(motion_centers) + FACE_WEIGHT * np.asarray(face_weights) * np.asarray(face_centers)
+    weights = MOTION_WEIGHT * motion_weights + FACE_WEIGHT * np.asarray(face_weights)
+
+    if use_detections:
+        detection_centers, detection_weights = get_detection_signal(video_path, source_fps, source_width, sample_count, fps)
+        weighted += DETECTION_WEIGHT * detection_centers
+        weights += DETECTION_WEIGHT * detection_weights
+
+    # Samples without any signal hold the previous center
+    centers = np.empty(sample_count, dtype=np.float64)
+    current = 0.5
+    for i in range(sample_count):
+        if weights[i] > 1e-6:
+            current = weighted[i] / weights[i]
+        centers[i] = current
+
+    half = crop_fraction / 2
+    centers = np.clip(smooth_trajectory(centers, fps), half, 1 - half)
+    times = np.arange(sample_count) / fps
+    return times, centers
+
+def get_keyframes(times, centers, interval=KEYFRAME_INTERVAL, tolerance=KEYFRAME_TOLERANCE):
+    """
+    Reduces the trajectory to keyframes every interval seconds, dropping those that barely move.
+    """
+    if len(times) == 0:
+        return [(0.0, 0.5)]
+    step = max(1, int(round(interval / (times[1] - times[0])))) if len(times) > 1 else 1
+    keyframes = [(float(times[0]), float(centers[0]))]
+    for i in range(step, len(times), step):
+        if abs(centers[i] - keyframes[-1][1]) >= tolerance:
+            keyframes.append((float(times[i]), float(centers[i])))
+    if keyframes[-1][0] != float(times[-1]):
+        keyframes.append((float(times[-1]), float(centers[-1])))
+    return keyframes
+
+def build_crop_x_expression(keyframes, source_width: int, crop_width: int):
+    """
+    Builds a piecewise-linear ffmpeg expression of t for the crop's x offset through the keyframes.
+    """
+    positions = [(t, round(center * source_width - crop_width / 2, 1)) for t, center in keyframes]
+    if len(positions) == 1:
+        return str(positions[0][1])
+
+    terms = []
+    for (t0, x0), (t1, x1) in zip(positions, positions[1:]):
+        if t1 <= t0:
+            continue
+        slope = round((x1 - x0) / (t1 - t0), 3)
+        terms.append(f"gte(t,{t0:.3f})*lt(t,{t1:.3f})*({x0}+{slope}*(t-{t0:.3f}))")
+    terms.append(f"gte(t,{positions[-1][0]:.3f})*{positions[-1][1]}")
+    terms.append(f"lt(t,{positions[0][0]:.3f})*{positions[0][1]}")
+    return "+".join(terms)
+
+def smart_crop_video(input_video, output_folder, desired_aspect_ratio=9/16, target_width=720, target_height=1280, use_detections=True, use_faces=True, preset="veryfast"):
+    """
+    Crops a video to the desired aspect ratio around its subject instead of letterboxing it.
+    The crop path comes from the low-resolution analysis and is applied with a keyframed crop
+    expression in a single full-resolution encode. Sources narrower than the desired aspect
+    ratio keep their full width and are padded rather than stretched.
+    Returns:
+        str: Path to the output video.
+    """
+    try:
+        os.makedirs(output_folder, exist_ok=True)
+        source_width, source_height, _ = get_video_info(input_video)
+
+        crop_width = min(source_width, int(source_height * desired_aspect_ratio) // 2 * 2)
+        times, centers = analyze_crop_trajectory(input_video, crop_width / source_width, use_detections, use_faces)
+        keyframes = get_keyframes(times, centers)
+        x_expression = build_crop_x_expression(keyframes, source_width, crop_width)
+
+        output_video = os.path.join(output_folder, os.path.basename(input_video).replace(".mp4", "_smart_crop.mp4"))
+
+        source = ffmpeg.input(input_video)
+        video = (
+            source.video
+            .filter("crop", crop_width, source_height, f"max(0,min(iw-ow,{x_expression}))", 0)
+            # The crop already has the target aspect ratio unless the source is narrower, then it is padded
+            .filter("scale", target_width, target_height, force_original_aspect_ratio="decrease", force_divisible_by=2)
+            .filter("pad", target_width, target_height, "(ow-iw)/2", "(oh-ih)/2", color="black")
+            .filter("setsar", 1)
+        )
+        stream = ffmpeg.output(
+            video, output_video, vcodec="libx264", preset=preset, acodec="aac", map="0:a?",
+            **encode_scheduler.get_output_args()
+        )
+        encode_scheduler.run(stream)
+
+        logging.info(f"Smart cropped {input_video} with {len(keyframes)} keyframes: {output_video}")
+        return output_video
+    except Exception as e:
+        logging.error(f"Error smart cropping video: {e}")
+        return None
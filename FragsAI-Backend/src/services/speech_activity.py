@@ -0,0 +1,76 @@
+import os
+import json
+import logging
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+from config import settings
+from .detection_cache import content_hash
+from .subtitles import load_audio
+from models.speech_map import SpeechMap, read_speech_map
+
+VAD_SAMPLE_RATE = 16000
+
+def detect_speech(audio: np.ndarray, sr: int = VAD_SAMPLE_RATE, min_silence_duration_ms: int = 500, speech_pad_ms: int = 200):
+    """
+    Runs Silero VAD (bundled with faster-whisper) over 16 kHz mono float32 samples.
+    """
+    if sr != VAD_SAMPLE_RATE:
+        raise ValueError(f"VAD expects {VAD_SAMPLE_RATE} Hz audio, got {sr}")
+
+    options = VadOptions(min_silence_duration_ms=min_silence_duration_ms, speech_pad_ms=speech_pad_ms)
+    timestamps = get_speech_timestamps(audio, options) if len(audio) else []
+    intervals = [(chunk["start"] / sr, chunk["end"] / sr) for chunk in timestamps]
+    return SpeechMap(intervals, len(audio) / sr)
+
+# Speech maps are stored as small JSON artifacts keyed by the content hash of the source
+_speech_maps_lock = threading.Lock()
+
+def get_speech_map_path(video_path: str):
+    return os.path.join(settings.speech_cache_folder, f"{content_hash(video_path)}.speech.json")
+
+def load_speech_map(video_path: str):
+    return read_speech_map(get_speech_map_path(video_path))
+
+def save_speech_map(video_path: str, speech_map: SpeechMap):
+    path = get_speech_map_path(video_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w") as f:
+        json.dump(speech_map.get_JSON(), f)
+    os.replace(temp_path, path)
+    return path
+
+def get_speech_map(video_path: str, audio: np.ndarray = None):
+    """
+    Returns the speech map of a source video, running VAD only the first time.
+    Args:
+        video_path (str): Path to the source video.
+        audio (np.ndarray): Optional 16 kHz samples of the video if they are already decoded.
+    """
+    with _speech_maps_lock:
+        speech_map = load_speech_map(video_path)
+    if speech_map is not None:
+        return speech_map
+
+    if audio is None:
+        audio = load_audio(video_path, sr=VAD_SAMPLE_RATE)
+    speech_map = detect_speech(audio)
+
+    with _speech_maps_lock:
+        save_speech_map(video_path, speech_map)
+    logging.info(f"Found {speech_map.get_speech_duration():.1f}s of speech in {speech_map.get_duration():.1f}s of {video_path}")
+    return speech_map
+
+# Uploads are run through VAD one at a time next to the rest of the pipeline
+_speech_map_executor = ThreadPoolExecutor(max_workers=1)
+
+def start_speech_map(video_path: str):
+    """
+    Builds the speech map of a source video in the background at ingest, so later stages
+    (and the standalone audio analysis through get_speech_map_path) find it on disk.
+    Returns:
+        Future: Resolves to the SpeechMap.
+    """
+    return _speech_map_executor.submit(get_speech_map, video_path)
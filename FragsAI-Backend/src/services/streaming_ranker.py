@@ -0,0 +1,77 @@
+import heapq
+import logging
+import threading
+
+class StreamingRanker():
+    """
+    Keeps a bounded top-k leaderboard of clips as their scores arrive.
+    Listeners are called with a leaderboard event whenever the top-k changes.
+
+    Once the leaderboard is full its lowest score can only go up, so a clip that scored
+    below it can never reach the top-k and is reported as eliminated.
+    """
+    def __init__(self, k: int = 10):
+        self.k = k
+        self.heap = []
+        self.scores = {}
+        self.sequence = 0
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def add(self, clip: str, score: float):
+        """
+        Records a clip's score and returns True if it entered the top-k.
+        """
+        evicted = None
+        with self.lock:
+            self.scores[clip] = score
+            entry = (score, self.sequence, clip)
+            self.sequence += 1
+
+            if len(self.heap) < self.k:
+                heapq.heappush(self.heap, entry)
+            elif score > self.heap[0][0]:
+                evicted = heapq.heapreplace(self.heap, entry)[2]
+            else:
+                return False
+
+            event = {
+                "type": "leaderboard",
+                "added": clip,
+                "evicted": evicted,
+                "leaderboard": self._leaderboard()
+            }
+
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logging.error(f"Leaderboard listener failed: {e}")
+        return True
+
+    def _leaderboard(self):
+        ranked = sorted(self.heap, key=lambda entry: (-entry[0], entry[1]))
+        return [{"rank": rank, "clip": clip, "score": score} for rank, (score, _, clip) in enumerate(ranked, start=1)]
+
+    def get_leaderboard(self):
+        with self.lock:
+            return self._leaderboard()
+
+    def get_ranked_clips(self):
+        """
+        Returns the current top-k as (score, clip) tuples, best first, like rank_clips.
+        """
+        return [(entry["score"], entry["clip"]) for entry in self.get_leaderboard()]
+
+    def get_threshold(self):
+        with self.lock:
+            return self.heap[0][0] if len(self.heap) >= self.k else None
+
+    def is_eliminated(self, clip: str):
+        with self.lock:
+            if clip not in self.scores or len(self.heap) < self.k:
+                return False
+            return all(entry[2] != clip for entry in self.heap)
@@ -1,9 +1,29 @@
 import os
 import math
+import logging
 import ffmpeg
 import pysrt
+import numpy as np
 from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip, AudioFileClip
-from faster_whisper import WhisperModel
+from .transcription import get_transcription_engine
+from .encoder import encode_scheduler
+
+# libass lays out SRT subtitles on a 288 pixel high canvas, font sizes are scaled to it
+ASS_PLAY_RES_Y = 288
+
+SUBTITLE_COLORS = {
+    "white": "FFFFFF",
+    "black": "000000",
+    "yellow": "FFFF00",
+    "red": "FF0000",
+    "green": "00FF00",
+    "blue": "0000FF",
+    "cyan": "00FFFF",
+    "magenta": "FF00FF",
+    "orange": "FFA500",
+    "purple": "800080",
+    "pink": "FFC0CB",
+}
 
 
 def extract_audio(video_path):
@@ -23,17 +43,37 @@ def extract_audio(video_path):
     return extracted_audio
 
 
-def transcribe(audio_path):
+def load_audio(video_path, sr=16000):
+    """
+    Decodes the audio track of a video straight into memory, resampled for Whisper.
+    Args:
+        video_path (str): Path to the video file.
+        sr (int): Output sample rate.
+    Returns:
+        np.ndarray: Mono float32 samples in [-1, 1], empty if the video has no audio.
+    """
+    try:
+        out, _ = (
+            ffmpeg.input(video_path)
+            .output("pipe:", format="f32le", acodec="pcm_f32le", ac=1, ar=sr)
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+    except ffmpeg.Error as e:
+        if b"does not contain any stream" in (e.stderr or b""):
+            return np.zeros(0, dtype=np.float32)
+        raise
+    return np.frombuffer(out, dtype=np.float32)
+
+
+def transcribe(audio):
     """
-    Transcribes audio using the Whisper model.
+    Transcribes audio using the shared Whisper model.
     Args:
-        audio_path (str): Path to the audio file.
+        audio (str | np.ndarray): Path to an audio file or 16 kHz mono float32 samples from load_audio.
     Returns:
         tuple: Transcription language and segments.
     """
-    model = WhisperModel("small")
-    segments, info = model.transcribe(audio_path)
-    language = info[0]
+    language, segments = get_transcription_engine().transcribe(audio)
     print("Transcription language:", language)
     return language, segments
 
@@ -51,18 +91,19 @@ def format_time(seconds):
     return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
 
 
-def generate_subtitle_file(language, segments, video_path):
+def generate_subtitle_file(language, segments, video_path, output_dir=None):
     """
     Generates a subtitle file (SRT) from transcription segments.
     Args:
         language (str): Detected language of the audio.
         segments (list): List of transcription segments.
         video_path (str): Path to the video file.
+        output_dir (str): Folder of the subtitle file, defaults to the video's folder.
     Returns:
         str: Path to the generated subtitle file.
     """
     video_name = os.path.splitext(os.path.basename(video_path))[0]
-    subtitle_file = os.path.join(os.path.dirname(video_path), f"sub-{video_name}.{language}.srt")
+    subtitle_file = os.path.join(output_dir or os.path.dirname(video_path), f"sub-{video_name}.{language}.srt")
     os.makedirs(os.path.dirname(subtitle_file), exist_ok=True)
     with open(subtitle_file, "w") as f:
         for index, segment in enumerate(segments):
@@ -100,13 +141,13 @@ def create_subtitle_clips(subtitles, videosize, fontsize=24, font='Arial', color
     return subtitle_clips
 
 
-def add_subtitle_to_video(video_path, subtitle_file, audio_file, font, color):
+def add_subtitle_to_video(video_path, subtitle_file, audio_file=None, font="Arial", color="yellow"):
     """
     Adds subtitles to a video with custom font and color.
     Args:
         video_path (str): Path to the video file.
         subtitle_file (str): Path to the subtitle file.
-        audio_file (str): Path to the audio file.
+        audio_file (str): Optional path to an audio file replacing the video's own audio.
         font (str): Font of the subtitles.
         color (str): Color of the subtitles.
     Returns:
@@ -119,24 +160,138 @@ def add_subtitle_to_video(video_path, subtitle_file, audio_file, font, color):
     subtitle_clips = create_subtitle_clips(subtitles, video.size, font=font, color=color)
     final_video = CompositeVideoClip([video] + subtitle_clips)
 
-    # Add extracted audio to the final video
-    audio_clip = AudioFileClip(audio_file)
-    final_video = final_video.set_audio(audio_clip)
+    # The composite keeps the video's own audio unless another track is given
+    if audio_file is not None:
+        final_video = final_video.set_audio(AudioFileClip(audio_file))
 
     final_video.write_videofile(output_video_file, codec="libx264")
     return output_video_file
 
 
-def apply_subtitles_to_clips(clip_paths, font="Arial", color="yellow"):
+def to_ass_color(color, alpha=0):
+    """
+    Converts a color name or #RRGGBB hex to the &HAABBGGRR format used by ASS styles.
+    """
+    rgb = SUBTITLE_COLORS.get(color.lower(), color.lstrip("#")).upper()
+    if len(rgb) != 6:
+        raise ValueError(f"Unsupported subtitle color: {color}")
+    return f"&H{alpha:02X}{rgb[4:6]}{rgb[2:4]}{rgb[0:2]}"
+
+
+def get_force_style(video_height, fontsize=24, font="Arial", color="yellow"):
+    """
+    Builds the ASS style matching create_subtitle_clips: colored text on a black box,
+    centered near the bottom fifth of the frame, fontsize in pixels of the video.
+    """
+    scale = ASS_PLAY_RES_Y / video_height
+    style = {
+        "FontName": font,
+        "FontSize": max(1, round(fontsize * scale)),
+        "PrimaryColour": to_ass_color(color),
+        "OutlineColour": to_ass_color("black"),
+        "BackColour": to_ass_color("black"),
+        "BorderStyle": 3,
+        "Outline": 1,
+        "Shadow": 0,
+        "Alignment": 2,
+        "MarginV": round(ASS_PLAY_RES_Y / 5 - fontsize * scale),
+    }
+    return ",".join(f"{key}={value}" for key, value in style.items())
+
+
+def burn_subtitles(video_path, subtitle_file, font="Arial", color="yellow", fontsize=24, output_video_file=None):
+    """
+    Burns subtitles into a video with ffmpeg's subtitles filter in a single encode.
+    The audio stream is copied untouched.
+    Args:
+        video_path (str): Path to the video file.
+        subtitle_file (str): Path to the SRT or ASS subtitle file.
+        font (str): Font of the subtitles.
+        color (str): Color name or #RRGGBB hex of the subtitles.
+        fontsize (int): Font size in pixels of the video.
+        output_video_file (str): Output path, defaults to <video>_subtitled.mp4 next to the video.
+    Returns:
+        str: Path to the subtitled video file, or video_path itself when there are no subtitles.
+    """
+    # The subtitles filter cannot open an empty SRT, a clip without speech is left as it is
+    if os.path.getsize(subtitle_file) == 0:
+        return video_path
+
+    output_video_file = output_video_file or video_path.replace('.mp4', '_subtitled.mp4')
+    video_stream = next(stream for stream in ffmpeg.probe(video_path)["streams"] if stream["codec_type"] == "video")
+
+    source = ffmpeg.input(video_path)
+    video = source.video.filter("subtitles", subtitle_file, force_style=get_force_style(int(video_stream["height"]), fontsize, font, color))
+    stream = ffmpeg.output(
+        video, output_video_file, vcodec="libx264", acodec="copy", map="0:a?",
+        **encode_scheduler.get_output_args()
+    )
+    encode_scheduler.run(stream)
+    return output_video_file
+
+
+def apply_subtitles_to_clips(clip_paths, font="Arial", color="yellow", ranker=None, transcript_index=None, clip_ranges=None, renderer="ffmpeg", keep_subtitle_files=True, output_dir=None):
     """
     Applies subtitles to a list of video clips.
     Args:
         clip_paths (list): List of video clip paths.
         font (str): Font of the subtitles.
         color (str): Color of the subtitles.
+        ranker (StreamingRanker): Optional ranker, clips that can no longer reach its top-k are skipped.
+        transcript_index (TranscriptIndex): Optional transcript of the source video the clips were cut from.
+        clip_ranges (dict): Clip path to its (start, end) in the source video, required with transcript_index.
+        renderer (str): "ffmpeg" burns subtitles in with the subtitles filter on the encode workers,
+                        "moviepy" composites TextClips.
+        keep_subtitle_files (bool): Keeps the SRT files, otherwise they are removed once burned in.
+        output_dir (str): Folder for the SRT files and the ffmpeg renderer's subtitled clips,
+                          defaults to each clip's folder.
+    Returns:
+        list: Paths to the subtitled video files in the order of the remaining clips, the clip itself
+              for clips without speech and None for clips that failed.
     """
-    for clip_path in clip_paths:
-        extracted_audio = extract_audio(clip_path)
-        language, segments = transcribe(extracted_audio)
-        subtitle_file = generate_subtitle_file(language, segments, clip_path)
-        add_subtitle_to_video(clip_path, subtitle_file, extracted_audio, font, color)
+    clip_paths = [clip_path for clip_path in clip_paths if ranker is None or not ranker.is_eliminated(clip_path)]
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    if transcript_index is not None:
+        # Subtitles are sliced from the source transcript, nothing is transcribed per clip
+        language = transcript_index.get_language()
+        transcriptions = [(language, transcript_index.query(*clip_ranges[clip_path])) for clip_path in clip_paths]
+    else:
+        audios = [load_audio(clip_path) for clip_path in clip_paths]
+
+        # All clips go through the shared model together instead of loading a model per clip
+        transcriptions = get_transcription_engine().transcribe_many(audios)
+
+    # Clips without speech get no subtitle file and are returned unchanged
+    subtitle_files = [
+        generate_subtitle_file(language, segments, clip_path, output_dir) if segments else None
+        for clip_path, (language, segments) in zip(clip_paths, transcriptions)
+    ]
+
+    def render(clip_path, subtitle_file):
+        # A failed clip is reported as None instead of failing every other clip of the batch
+        output_video_file = None
+        if subtitle_file is None:
+            return clip_path
+        try:
+            if renderer == "moviepy":
+                return add_subtitle_to_video(clip_path, subtitle_file, font=font, color=color)
+            output_video_file = os.path.join(output_dir or os.path.dirname(clip_path), os.path.basename(clip_path).replace('.mp4', '_subtitled.mp4'))
+            return burn_subtitles(clip_path, subtitle_file, font, color, output_video_file=output_video_file)
+        except Exception as e:
+            logging.error(f"Error subtitling {clip_path}: {e}")
+            if output_video_file is not None and os.path.exists(output_video_file):
+                os.remove(output_video_file)
+            return None
+
+    try:
+        if renderer == "moviepy":
+            return [render(clip_path, subtitle_file) for clip_path, subtitle_file in zip(clip_paths, subtitle_files)]
+        # Every clip of the job is encoded in parallel
+        return encode_scheduler.map(render, clip_paths, subtitle_files)
+    finally:
+        if not keep_subtitle_files:
+            for subtitle_file in subtitle_files:
+                if subtitle_file is not None and os.path.exists(subtitle_file):
+                    os.remove(subtitle_file)
@@ -3,7 +3,7 @@ import numpy as np
 import ast
 import json
 import requests
-from .virality_ranking import predict_actions
+from .action_detection import extract_detections
 from config import settings
 import logging
 
@@ -25,10 +25,21 @@ cv2_map = {
 
 # -------- Mode 1: Best Frame from Clip -------- #
 def select_best_frame(video_path: str):
-    predictions = predict_actions(video_path)
-    frame_confidences = np.max(np.array(predictions))
-    best_index = np.argmax(frame_confidences)
-    return video_path, best_index
+    """
+    Finds the moment of the most confident detection.
+    Returns:
+        tuple: Video path and the time of the best frame in seconds.
+    """
+    # Detections are cached, so clips that were already ranked do not rerun YOLO here
+    detections = extract_detections(video_path)
+    if not len(detections):
+        return video_path, 0
+    best_index = np.argmax(detections["confidence"])
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    cap.release()
+    return video_path, int(detections["frame"][best_index]) / fps
 
 def generate_thumbnail_background(video_path: str, output_path: str, time_sec=7, size: tuple[int, int] = (1280, 720)):
     cap = cv2.VideoCapture(video_path)
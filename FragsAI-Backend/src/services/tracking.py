@@ -0,0 +1,149 @@
+import cv2
+import numpy as np
+from models.detections import DETECTION_DTYPE
+
+# Frames are downscaled to this width before optical flow, boxes are kept in full-frame coordinates
+FLOW_WIDTH = 320
+MIN_TRACK_POINTS = 4
+
+def compute_iou(box_a, box_b):
+    ax, ay, aw, ah = box_a
+    bx, by, bw, bh = box_b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    intersection = inter_w * inter_h
+    union = aw * ah + bw * bh - intersection
+    return intersection / union if union > 0 else 0.0
+
+class Track():
+    def __init__(self, track_id: int, detection: np.void):
+        self.id = track_id
+        self.class_id = int(detection['class_id'])
+        self.confidence = float(detection['confidence'])
+        self.box = detection['box'].astype(np.float32)
+        self.first_frame = int(detection['frame'])
+        self.last_frame = int(detection['frame'])
+        self.samples = 1
+        self.points = None
+
+    def get_length(self):
+        return self.samples
+
+    def get_duration(self, fps: float):
+        return (self.last_frame - self.first_frame) / fps if fps else 0.0
+
+    def get_JSON(self, fps: float, labels: list):
+        return {
+            "track_id": self.id,
+            "action": labels[self.class_id],
+            "first_frame": self.first_frame,
+            "last_frame": self.last_frame,
+            "duration": round(self.get_duration(fps), 3)
+        }
+
+class IoUTracker():
+    """
+    Carries detections forward between sparse detector keyframes.
+    Detections are matched to tracks by IoU on keyframes, and in between tracks are moved
+    by the median Lucas-Kanade flow of feature points inside their box.
+    """
+    def __init__(self, iou_threshold=0.3):
+        self.iou_threshold = iou_threshold
+        self.active: list[Track] = []
+        self.finished: list[Track] = []
+        self.next_id = 0
+        self.prev_gray = None
+        self.scale = 1.0
+
+    def _prepare(self, frame):
+        height, width = frame.shape[:2]
+        self.scale = min(1.0, FLOW_WIDTH / width)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.scale < 1.0:
+            gray = cv2.resize(gray, (int(width * self.scale), int(height * self.scale)), interpolation=cv2.INTER_AREA)
+        return gray
+
+    def _seed_points(self, track: Track, gray):
+        x, y, w, h = (track.box * self.scale).astype(int)
+        mask = np.zeros_like(gray)
+        mask[max(0, y):max(0, y + h), max(0, x):max(0, x + w)] = 255
+        track.points = cv2.goodFeaturesToTrack(gray, maxCorners=20, qualityLevel=0.01, minDistance=3, mask=mask)
+
+    def update(self, detections: np.ndarray, frame):
+        """
+        Matches keyframe detections to active tracks. Unmatched tracks are finished.
+        """
+        gray = self._prepare(frame)
+        pairs = sorted(
+            ((compute_iou(track.box, det['box']), t, d)
+             for t, track in enumerate(self.active)
+             for d, det in enumerate(detections)
+             if track.class_id == det['class_id']),
+            reverse=True
+        )
+
+        matched_tracks, matched_detections = set(), set()
+        for iou, t, d in pairs:
+            if iou < self.iou_threshold or t in matched_tracks or d in matched_detections:
+                continue
+            track, det = self.active[t], detections[d]
+            track.box = det['box'].astype(np.float32)
+            track.confidence = float(det['confidence'])
+            track.last_frame = int(det['frame'])
+            track.samples += 1
+            matched_tracks.add(t)
+            matched_detections.add(d)
+
+        survivors = []
+        for t, track in enumerate(self.active):
+            (survivors if t in matched_tracks else self.finished).append(track)
+
+        for d, det in enumerate(detections):
+            if d not in matched_detections:
+                survivors.append(Track(self.next_id, det))
+                self.next_id += 1
+
+        self.active = survivors
+        for track in self.active:
+            self._seed_points(track, gray)
+        self.prev_gray = gray
+
+    def propagate(self, frame, frame_idx: int):
+        """
+        Moves active tracks to the given frame and returns their carried detections.
+        Also returns how many tracks were lost, so the caller can re-run the detector.
+        """
+        gray = self._prepare(frame)
+        carried, survivors, lost = [], [], 0
+
+        for track in self.active:
+            if track.points is None or len(track.points) < MIN_TRACK_POINTS:
+                self.finished.append(track)
+                lost += 1
+                continue
+
+            next_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, track.points, None)
+            status = status.flatten() == 1
+            if np.count_nonzero(status) < MIN_TRACK_POINTS:
+                self.finished.append(track)
+                lost += 1
+                continue
+
+            shift = np.median(next_points[status] - track.points[status], axis=0).flatten() / self.scale
+            track.box[:2] += shift
+            track.points = next_points[status].reshape(-1, 1, 2)
+            track.last_frame = frame_idx
+            track.samples += 1
+            survivors.append(track)
+
+            carried.append((frame_idx, track.class_id, track.confidence, track.box.astype(np.int32)))
+
+        self.active = survivors
+        self.prev_gray = gray
+        return np.array(carried, dtype=DETECTION_DTYPE), lost
+
+    def has_tracks(self):
+        return len(self.active) > 0
+
+    def get_tracks(self):
+        return self.finished + self.active
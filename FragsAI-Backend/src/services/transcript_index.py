@@ -0,0 +1,103 @@
+import bisect
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from .subtitles import load_audio
+from .transcription import get_transcription_engine, WHISPER_SAMPLE_RATE
+from .speech_activity import get_speech_map
+
+class TranscriptSegment(NamedTuple):
+    start: float
+    end: float
+    text: str
+
+class TranscriptIndex():
+    """
+    Time-sorted transcript segments of a whole source video.
+    A clip's subtitles are answered with an interval query instead of transcribing the clip again.
+    """
+    def __init__(self, segments, language: str = None):
+        self.language = language
+        self.segments = sorted(
+            (TranscriptSegment(float(segment.start), float(segment.end), segment.text) for segment in segments),
+            key=lambda segment: segment.start
+        )
+        self.starts = [segment.start for segment in self.segments]
+
+        # Running maximum of the end times, so overlapping segments still bisect correctly
+        self.max_ends = []
+        max_end = float("-inf")
+        for segment in self.segments:
+            max_end = max(max_end, segment.end)
+            self.max_ends.append(max_end)
+
+    def get_language(self):
+        return self.language
+
+    def get_length(self):
+        return len(self.segments)
+
+    def query(self, start: float, end: float, clip_relative: bool = True):
+        """
+        Returns the segments overlapping [start, end), trimmed to the interval.
+        With clip_relative the times are shifted so the interval starts at 0.
+        """
+        start, end = float(start), float(end)
+        first = bisect.bisect_right(self.max_ends, start)
+        last = bisect.bisect_left(self.starts, end)
+        offset = start if clip_relative else 0.0
+
+        results = []
+        for segment in self.segments[first:last]:
+            if segment.end <= start:
+                continue
+            results.append(TranscriptSegment(
+                max(segment.start, start) - offset,
+                min(segment.end, end) - offset,
+                segment.text
+            ))
+        return results
+
+    def get_text(self, start: float, end: float):
+        return " ".join(segment.text.strip() for segment in self.query(start, end))
+
+def build_transcript_index(video_path: str, speech_only: bool = True):
+    """
+    Transcribes a source video once and indexes its segments.
+    With speech_only, only the speech regions of the video's speech map are sent to Whisper
+    and their segment times are shifted back onto the source timeline.
+    """
+    audio = load_audio(video_path, sr=WHISPER_SAMPLE_RATE)
+    engine = get_transcription_engine()
+
+    if not speech_only:
+        language, segments = engine.transcribe(audio)
+        logging.info(f"Indexed {len(segments)} transcript segments of {video_path} ({language})")
+        return TranscriptIndex(segments, language)
+
+    regions = get_speech_map(video_path, audio).get_regions()
+    buffers = [audio[int(start * WHISPER_SAMPLE_RATE):int(end * WHISPER_SAMPLE_RATE)] for start, end in regions]
+    transcriptions = engine.transcribe_many(buffers)
+
+    segments = [
+        TranscriptSegment(segment.start + start, segment.end + start, segment.text)
+        for (start, _), (_, region_segments) in zip(regions, transcriptions)
+        for segment in region_segments
+    ]
+    languages = Counter(language for language, _ in transcriptions)
+    language = languages.most_common(1)[0][0] if languages else None
+
+    logging.info(f"Indexed {len(segments)} transcript segments from {len(regions)} speech regions of {video_path} ({language})")
+    return TranscriptIndex(segments, language)
+
+# Source videos are transcribed one at a time next to the rest of the pipeline
+_index_executor = ThreadPoolExecutor(max_workers=1)
+
+def start_transcript_index(video_path: str):
+    """
+    Starts indexing a source video in the background, e.g. while it is being segmented.
+    Returns:
+        Future: Resolves to the TranscriptIndex.
+    """
+    return _index_executor.submit(build_transcript_index, video_path)
@@ -0,0 +1,84 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio
+from config import settings
+
+WHISPER_SAMPLE_RATE = 16000
+
+class TranscriptionEngine():
+    """
+    Holds one faster-whisper model for the whole process.
+    Long audio is transcribed through the batched pipeline, and several clips are
+    transcribed concurrently on the model's num_workers.
+    """
+    def __init__(self, model_size="small", device="cpu", compute_type="int8", cpu_threads=0, num_workers=1, batch_size=8):
+        self.model = WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads, num_workers=num_workers)
+        self.pipeline = BatchedInferencePipeline(model=self.model)
+        self.num_workers = num_workers
+        self.batch_size = batch_size
+
+    def transcribe(self, audio):
+        """
+        Transcribes an audio file path or a 16 kHz mono float32 array.
+        Returns:
+            tuple: Transcription language and a list of segments.
+        """
+        if self.batch_size > 1:
+            segments, info = self.pipeline.transcribe(audio, batch_size=self.batch_size)
+        else:
+            segments, info = self.model.transcribe(audio)
+        return info.language, list(segments)
+
+    def transcribe_many(self, audios: list):
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            return list(executor.map(self.transcribe, audios))
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_transcription_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = TranscriptionEngine(
+                settings.whisper_model,
+                device=settings.whisper_device,
+                compute_type=settings.whisper_compute_type,
+                cpu_threads=settings.whisper_cpu_threads,
+                num_workers=settings.whisper_num_workers,
+                batch_size=settings.whisper_batch_size
+            )
+        return _engine
+
+DEFAULT_BENCHMARK_CONFIGS = [
+    {"compute_type": "float32", "cpu_threads": 4, "batch_size": 1},
+    {"compute_type": "int8", "cpu_threads": 4, "batch_size": 1},
+    {"compute_type": "int8", "cpu_threads": 4, "batch_size": 8},
+    {"compute_type": "int8", "cpu_threads": 8, "batch_size": 16},
+]
+
+def benchmark_transcription(audio_path: str, configs: list = None, model_size: str = None):
+    """
+    Transcribes the same audio with each configuration and reports its real-time factor
+    (processing time divided by audio duration, lower is faster).
+    """
+    audio = decode_audio(audio_path, sampling_rate=WHISPER_SAMPLE_RATE)
+    duration = len(audio) / WHISPER_SAMPLE_RATE
+    results = []
+
+    for config in configs or DEFAULT_BENCHMARK_CONFIGS:
+        load_start = time.perf_counter()
+        engine = TranscriptionEngine(model_size or settings.whisper_model, device=settings.whisper_device, **config)
+        load_time = time.perf_counter() - load_start
+
+        start = time.perf_counter()
+        engine.transcribe(audio)
+        elapsed = time.perf_counter() - start
+
+        result = {**config, "load_time": round(load_time, 2), "seconds": round(elapsed, 2), "rtf": round(elapsed / duration, 4) if duration else None}
+        logging.info(f"Transcription benchmark {result}")
+        results.append(result)
+
+    return results
@@ -1,16 +1,121 @@
 import os
+import logging
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
 from config import settings
 from models.job_manager import manager
 from services.transfer import transfer_clips_to_backend
 from services.clip_segmentation import segment_video_and_audio
+from services.proxy import create_proxy, remove_proxy
+from services.speech_activity import start_speech_map
+from services.streaming_ranker import StreamingRanker
+from services.subtitles import apply_subtitles_to_clips
+from services.transcript_index import start_transcript_index
+from services.virality_ranking import predict_virality, get_ranking_pool, reset_ranking_pool, copy_files
 from fastapi.responses import JSONResponse
 
+def subtitle_segments(segments, transcript_index):
+    """
+    Burns subtitles sliced from the source transcript into the exported segments in place.
+    Subtitle files and encodes are written to download_folder/subtitles, outside the uploaded
+    videos folder, and a clip whose encode fails keeps its unsubtitled version.
+    """
+    clip_ranges = {clip_path: (start, end) for clip_path, start, end in segments}
+    clip_paths = list(clip_ranges)
+    work_dir = os.path.join(settings.download_folder, "subtitles")
+    subtitled_paths = []
+    try:
+        subtitled_paths = apply_subtitles_to_clips(
+            clip_paths, transcript_index=transcript_index, clip_ranges=clip_ranges,
+            keep_subtitle_files=False, output_dir=work_dir
+        )
+        for clip_path, subtitled_path in zip(clip_paths, subtitled_paths):
+            if subtitled_path is None:
+                logging.warning(f"Uploading {clip_path} without subtitles")
+            elif subtitled_path != clip_path:
+                os.replace(subtitled_path, clip_path)
+    finally:
+        for subtitled_path in subtitled_paths:
+            if subtitled_path is not None and subtitled_path not in clip_ranges and os.path.exists(subtitled_path):
+                os.remove(subtitled_path)
+
 def process_and_update_video(job_id, path):
     if not manager.exists(job_id):
         manager.add_job(job_id)
         job = manager.get_job(job_id)
 
-        segment_video_and_audio(path, settings.download_folder, job)
+        # Clips are scored as soon as they are exported and the leaderboard is pushed to the job
+        ranker = StreamingRanker(settings.top_k_clips)
+        ranker.subscribe(lambda event: job.set_leaderboard(event["leaderboard"]))
+        executor = get_ranking_pool() if settings.ranking_processes else concurrent.futures.ThreadPoolExecutor()
+        # Clip path of every pending score future. Scores are only ever added to the ranker from
+        # this thread: a future wakes its waiters before it runs its done callbacks.
+        futures = {}
+
+        def add_score(future):
+            clip_path = futures.pop(future)
+            try:
+                ranker.add(clip_path, future.result())
+            except BrokenProcessPool:
+                logging.error(f"Ranking pool broke while processing video {clip_path}")
+                reset_ranking_pool(executor)
+            except Exception as e:
+                logging.error(f"Error ranking video {clip_path}: {e}")
+
+        def score_segment(clip_path):
+            # Scores that finished while the previous segment was exported go on the leaderboard now
+            for future in [future for future in futures if future.done()]:
+                add_score(future)
+            try:
+                future = executor.submit(predict_virality, clip_path)
+            except BrokenProcessPool:
+                # Clips exported after the pool broke are left unranked
+                logging.error(f"Ranking pool is broken, skipping video {clip_path}")
+                reset_ranking_pool(executor)
+                return
+            futures[future] = clip_path
+
+        # The source is transcribed once in the background while it is segmented.
+        # Indexing builds the speech map itself, SPEECH_MAP_UPLOADS runs VAD on its own at ingest
+        # for the standalone audio analysis, which reads the map from get_speech_map_path.
+        transcript_future = start_transcript_index(path) if settings.subtitle_clips else None
+        speech_future = start_speech_map(path) if transcript_future is None and settings.speech_map_uploads else None
+
+        # With PROXY_UPLOADS the motion scan decodes a low-resolution proxy, only the segment cuts read the upload
+        if settings.proxy_uploads:
+            create_proxy(path)
+        try:
+            # Ranking runs YOLO over every exported clip, RANK_UPLOADS=false skips it
+            on_segment = score_segment if settings.rank_uploads else None
+            segments = segment_video_and_audio(path, settings.download_folder, job, on_segment=on_segment)
+        finally:
+            remove_proxy(path)
+
+        for future in concurrent.futures.as_completed(list(futures)):
+            add_score(future)
+        if not settings.ranking_processes:
+            executor.shutdown()
+
+        if speech_future is not None:
+            try:
+                speech_future.result()
+            except Exception as e:
+                logging.error(f"Error building the speech map of {path}: {e}")
+
+        # Clips are subtitled after scoring and before publishing, so the published files carry the subtitles
+        if transcript_future is not None:
+            try:
+                subtitle_segments(segments, transcript_future.result())
+            except Exception as e:
+                logging.error(f"Error subtitling clips of {path}: {e}")
+
+        if settings.rank_uploads:
+            copy_files(ranker.get_ranked_clips(), job_id)
+            job.set_leaderboard(ranker.get_leaderboard())
+
+        # The job only completes once every clip has been ranked and published
+        job.set_status("completed")
+
         path = os.path.join(settings.download_folder, "videos")
 
         response = transfer_clips_to_backend(path, job)
@@ -3,10 +3,17 @@ import cv2
 import numpy as np
 import logging
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
-import subprocess
+import threading
+import multiprocessing
 from tqdm import tqdm
 import concurrent.futures
-from .action_detection import extract_features
+from concurrent.futures.process import BrokenProcessPool
+from .action_detection import extract_detections, run_detector, INPUT_SIZE, SCREEN_INPUT_SIZE
+from models.detections import count_events, weight_events
+from models.yolo_model import yolo_model, get_screen_model
+from .tracking import IoUTracker
+from .artifact_store import ArtifactStore
+from .frame_sampler import sample_frames
 from config import settings
 
 # Set up logging
@@ -19,6 +26,7 @@ NO_OF_CHANNELS = 3
 TIMESTEPS = 10
 VIRALITY_FOLDER_PATH = os.path.join(settings.download_folder, "clip_virality")
 os.makedirs(VIRALITY_FOLDER_PATH, exist_ok=True)
+artifact_store = ArtifactStore(VIRALITY_FOLDER_PATH)
 
 # Event Weights
 EVENT_WEIGHTS = {
@@ -32,42 +40,52 @@ EVENT_WEIGHTS = {
 
 # Extract frames (used elsewhere)
 def extract_frames(video_path: str):
-    frames_list = []
-    videoObj = cv2.VideoCapture(video_path)
+    # Frames are spread evenly over the whole clip instead of taken from its first third of a second
     logging.info(f"Extracting frames from video: {video_path}")
+    frames = sample_frames(video_path, TIMESTEPS, (IMAGE_WIDTH, IMAGE_HEIGHT))
+    return list(frames / MAX_PIXEL_VALUE)
 
-    while len(frames_list) < TIMESTEPS:
-        success, image = videoObj.read()
-        if not success:
-            break
-        resized_frame = cv2.resize(image, (IMAGE_HEIGHT, IMAGE_WIDTH))
-        normalized_frame = resized_frame / MAX_PIXEL_VALUE
-        frames_list.append(normalized_frame)
-    videoObj.release()
-
-    while len(frames_list) < TIMESTEPS:
-        frames_list.append(frames_list[-1])
-
-    return frames_list[:TIMESTEPS]
+def get_video_fps(video_path: str):
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    return fps
 
 # Sentiment Analysis (optional)
+# The VADER lexicon is loaded once per process
+_vader_analyzer = None
+
 def sentiment_analysis(text):
-    vader_analyzer = SentimentIntensityAnalyzer()
-    return vader_analyzer.polarity_scores(text)["compound"]
+    global _vader_analyzer
+    if _vader_analyzer is None:
+        _vader_analyzer = SentimentIntensityAnalyzer()
+    return _vader_analyzer.polarity_scores(text)["compound"]
 
 # Predict Actions using YOLO
 
-def predict_actions(video_path: str):
-    detections = extract_features(video_path)
-    event_count = {}
+def predict_actions(video_path: str, tracking=None, game: str = None):
+    # game selects the ROI profile, None falls back to settings.detection_game
+    tracking = settings.detection_tracking if tracking is None else tracking
+    labels = yolo_model.get_class_labels()
+
+    if tracking:
+        # Each track counts once per sampled frame it covers, matching full per-frame detection
+        tracker = IoUTracker()
+        extract_detections(video_path, game=game, tracker=tracker)
+        fps = get_video_fps(video_path)
+        event_count = {}
+        event_durations = {}
+        for track in tracker.get_tracks():
+            action = labels[track.class_id]
+            event_count[action] = event_count.get(action, 0) + track.get_length()
+            event_durations[action] = event_durations.get(action, 0) + track.get_duration(fps)
+        logging.info(f"Event durations for {video_path}: {event_durations}")
+        weighted_action_score = sum(EVENT_WEIGHTS.get(event, 0.5) * count for event, count in event_count.items())
+    else:
+        detections = extract_detections(video_path, game=game)
+        logging.info(f"Event counts for {video_path}: {count_events(detections, labels)}")
+        weighted_action_score = weight_events(detections, labels, EVENT_WEIGHTS)
 
-    for det in detections:
-        event = det['action']
-        if event not in event_count:
-            event_count[event] = 0
-        event_count[event] += 1
-
-    weighted_action_score = sum(EVENT_WEIGHTS.get(event, 0.5) * count for event, count in event_count.items())
     return max(weighted_action_score, 0.1)
 
 # Compute Virality Score
@@ -83,9 +101,9 @@ def compute_virality_score(sentiment_score, weighted_action_score):
 
 # Predict Virality
 
-def predict_virality(video_path):
+def predict_virality(video_path, game: str = None, tracking=None):
     sentiment_score = 0  # Optional, skip for now
-    weighted_action_score = predict_actions(video_path)
+    weighted_action_score = predict_actions(video_path, tracking=tracking, game=game)
 
     sentiment_weight = 0.1
     action_weight = 0.9
@@ -97,36 +115,92 @@ def predict_virality(video_path):
     logging.info(f"Virality score for {video_path}: {virality_score:.2f}")
     return round(virality_score, 2)
 
+# Process Pool
+
+# Long-lived pool shared by every ranking job. Workers are spawned rather than forked so each
+# one loads its own YOLO network instead of sharing OpenCV state with the server process.
+_ranking_pool = None
+_ranking_pool_lock = threading.Lock()
+
+def _init_ranking_worker():
+    # One OpenCV thread per worker, the pool itself provides the parallelism
+    cv2.setNumThreads(1)
+
+    # The network is read on import, but OpenCV only allocates its layers on the first forward pass.
+    # Running one here keeps that cost out of the first clip every worker scores.
+    net, output_layers, _ = yolo_model.get_details()
+    run_detector(net, output_layers, np.zeros((INPUT_SIZE[1], INPUT_SIZE[0], 3), dtype=np.uint8))
+    if settings.detection_cascade:
+        screen_model = get_screen_model()
+        run_detector(screen_model.get_model(), screen_model.get_layers(), np.zeros((SCREEN_INPUT_SIZE[1], SCREEN_INPUT_SIZE[0], 3), dtype=np.uint8), SCREEN_INPUT_SIZE)
+    logging.info(f"Ranking worker {os.getpid()} loaded detector {yolo_model.get_version()}")
+
+def get_ranking_pool():
+    global _ranking_pool
+    with _ranking_pool_lock:
+        if _ranking_pool is None:
+            _ranking_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=settings.ranking_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_ranking_worker
+            )
+        return _ranking_pool
+
+def reset_ranking_pool(broken_pool):
+    """
+    Drops a broken pool so the next get_ranking_pool call starts a fresh one.
+    Every future of a broken pool fails, so this only acts for the pool that is still current.
+    """
+    global _ranking_pool
+    with _ranking_pool_lock:
+        if _ranking_pool is broken_pool:
+            _ranking_pool.shutdown(wait=False, cancel_futures=True)
+            _ranking_pool = None
+            logging.error("Ranking pool broke, it will be recreated for the next job")
+
+def shutdown_ranking_pool():
+    global _ranking_pool
+    with _ranking_pool_lock:
+        if _ranking_pool is not None:
+            _ranking_pool.shutdown(wait=False, cancel_futures=True)
+            _ranking_pool = None
+
 # Rank Clips
 
-def rank_clips(video_clips, action_model=None):
+def rank_clips(video_clips, action_model=None, use_processes=None, game: str = None, tracking=None):
+    use_processes = settings.ranking_processes if use_processes is None else use_processes
     ranked_clips = []
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = {executor.submit(predict_virality, clip): clip for clip in video_clips}
+
+    if use_processes:
+        executor = get_ranking_pool()
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor()
+
+    try:
+        futures = {executor.submit(predict_virality, clip, game, tracking): clip for clip in video_clips}
         for future in tqdm(concurrent.futures.as_completed(futures), total=len(futures), desc="Ranking clips"):
             clip = futures[future]
             try:
                 score = future.result()
                 ranked_clips.append((score, clip))
+            except BrokenProcessPool:
+                # A worker died, drop the pool once so the next job starts a fresh one
+                logging.error(f"Ranking pool broke while processing video {clip}")
+                reset_ranking_pool(executor)
             except Exception as e:
                 logging.error(f"Error processing video {clip}: {e}")
+    finally:
+        if not use_processes:
+            executor.shutdown()
 
     ranked_clips.sort(reverse=True, key=lambda x: x[0])
     return ranked_clips
 
 # Copy Files
 
-def copy_files(ranked_clips):
-    for rank, (score, clip) in enumerate(ranked_clips, start=1):
-        _, filename = os.path.split(clip)
-        name, ext = os.path.splitext(filename)
-        new_name = f"{rank:02d}_{name}_score_{score:.2f}{ext}"
-        new_path = os.path.join(VIRALITY_FOLDER_PATH, new_name)
-
-        command = ["ffmpeg", "-i", clip, "-c:v", "copy", "-c:a", "copy", new_path, "-y"]
-        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-        logging.info(f"Copied {clip} -> {new_path}")
+def copy_files(ranked_clips, job_id: str = None):
+    # Clips are reflinked (or copied) into place, ranks and scores go into the manifest
+    return artifact_store.publish_ranking(ranked_clips, job_id)
 
 # Get video clips from folder
 
@@ -4,6 +4,7 @@ import librosa
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from tqdm import tqdm
 import subprocess
+from speech_map import read_speech_map
 
 # --- Step 1: Extract audio from video ---
 from moviepy.editor import VideoFileClip
@@ -23,8 +24,19 @@ def extract_audio_ffmpeg(video_path, audio_path="extracted_audio.wav"):
     return audio_path
 
 
+# --- Speech map from the voice activity detection stage ---
+# Loud frames inside speech are usually shouting or callouts, not gunfire
+SPEECH_THRESHOLD_SCALE = 2.0
+
+def load_speech_map(speech_map_path):
+    """
+    Loads a speech map JSON written by the VAD stage (the backend's get_speech_map_path).
+    Returns None when there is no speech map, so detectors fall back to scanning everything.
+    """
+    return read_speech_map(speech_map_path)
+
 # --- Step 2: Analyze audio for gunshot sounds ---
-def detect_gunshots(audio_path, sr=22050, threshold=0.3):
+def detect_gunshots(audio_path, sr=22050, threshold=0.3, speech_map=None, speech_threshold_scale=SPEECH_THRESHOLD_SCALE):
     print("Loading audio for gunshot detection...")
     y, sr = librosa.load(audio_path, sr=sr)
     hop_length = 512
@@ -32,16 +44,20 @@ def detect_gunshots(audio_path, sr=22050, threshold=0.3):
     rms = librosa.feature.rms(y=y, frame_length=frame_length, hop_length=hop_length)[0]
     times = librosa.frames_to_time(np.arange(len(rms)), sr=sr, hop_length=hop_length, n_fft=frame_length)
 
+    thresholds = np.full(len(rms), threshold, dtype=np.float64)
+    if speech_map is not None:
+        thresholds[speech_map.mask(times)] *= speech_threshold_scale
+
     gunshot_times = []
     in_shot = False
     start_time = 0
 
     print("Detecting gunshots in audio frames...")
-    for t, energy in tqdm(zip(times, rms), total=len(rms), mininterval=0.5, smoothing=0.1):
-        if energy > threshold and not in_shot:
+    for t, energy, frame_threshold in tqdm(zip(times, rms, thresholds), total=len(rms), mininterval=0.5, smoothing=0.1):
+        if energy > frame_threshold and not in_shot:
             in_shot = True
             start_time = t
-        elif energy <= threshold and in_shot:
+        elif energy <= frame_threshold and in_shot:
             in_shot = False
             end_time = t
             gunshot_times.append((start_time, end_time))
@@ -60,12 +76,16 @@ def detect_gunshots(audio_path, sr=22050, threshold=0.3):
     return merged
 
 # --- Step 3: Analyze laughter using pre-trained model (placeholder) ---
-def detect_laughter(audio_path):
+def detect_laughter(audio_path, speech_map=None):
     print("Loading audio for laughter detection...")
     y, sr = librosa.load(audio_path, sr=22050)
     rms = librosa.feature.rms(y=y)[0]
     times = librosa.frames_to_time(np.arange(len(rms)), sr=sr)
 
+    # Laughter is vocal, frames outside speech are skipped when a speech map is available
+    if speech_map is not None:
+        rms = np.where(speech_map.mask(times), rms, 0.0)
+
     laughter_times = []
     in_laugh = False
     start_time = 0
@@ -143,18 +163,19 @@ def save_clips_fast_parallel(video_path, segments, output_dir="clips", max_worke
             print(f"Saved clip: {clip_path}")
 
 # --- Main pipeline ---
-def main_pipeline(video_path):
+def main_pipeline(video_path, speech_map_path=None):
     print("Step 1: Extracting audio...")
     audio_path = extract_audio_ffmpeg(video_path)  # use ffmpeg version here
+    speech_map = load_speech_map(speech_map_path)
 
     # rest of pipeline unchanged ...
 
     print("Step 2: Detecting gunshots...")
-    gunshots = detect_gunshots(audio_path)
+    gunshots = detect_gunshots(audio_path, speech_map=speech_map)
     print(f"Gunshot segments: {gunshots}")
 
     print("Step 3: Detecting laughter...")
-    laughs = detect_laughter(audio_path)
+    laughs = detect_laughter(audio_path, speech_map=speech_map)
     print(f"Laughter segments: {laughs}")
 
     print("Step 4: Merging segments...")
@@ -8,7 +8,7 @@ from tqdm import tqdm
 from tensorflow.keras.models import load_model
 
 # --- Import all your utility modules ---
-from audio_analysis import extract_audio_ffmpeg, detect_gunshots, detect_laughter, merge_segments
+from audio_analysis import extract_audio_ffmpeg, detect_gunshots, detect_laughter, merge_segments, load_speech_map
 from video_to_clips import find_loudest_moments
 from shot_sift_updated import adjust_sample_interval, extract_frames_sequential, detect_shot_boundaries
 from preprocessing_final import extract_frames, process_frames, adjust_sample_interval as preprocess_interval, determine_chunk_size
@@ -75,10 +75,11 @@ def sliding_window_predict(video_path, model_path=MODEL_PATH, window=TIMESTEPS,
     return segments
 
 # ----------- 3. AUDIO ANALYSIS --------------
-def audio_events(video_path):
+def audio_events(video_path, speech_map_path=None):
     audio_path = extract_audio_ffmpeg(video_path)
-    gunshots = detect_gunshots(audio_path)
-    laughs = detect_laughter(audio_path)
+    speech_map = load_speech_map(speech_map_path)
+    gunshots = detect_gunshots(audio_path, speech_map=speech_map)
+    laughs = detect_laughter(audio_path, speech_map=speech_map)
     merged = merge_segments(gunshots, laughs)
     audio, sr = sf.read(audio_path)
     loudest = find_loudest_moments(audio, sr, num_clips=30, clip_length=5)
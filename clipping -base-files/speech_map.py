@@ -0,0 +1,82 @@
+import os
+import json
+import logging
+import numpy as np
+
+SPEECH_MAP_VERSION = 1
+
+class SpeechMap():
+    """
+    Speech intervals of a source video in seconds, sorted and non-overlapping.
+    Everything outside them is treated as non-speech (silence, music, game audio).
+    """
+    def __init__(self, intervals, duration: float):
+        self.intervals = np.asarray(intervals, dtype=np.float64).reshape(-1, 2)
+        self.duration = float(duration)
+
+    def get_intervals(self):
+        return self.intervals
+
+    def get_duration(self):
+        return self.duration
+
+    def get_speech_duration(self):
+        return float(np.sum(self.intervals[:, 1] - self.intervals[:, 0]))
+
+    def get_regions(self, max_gap: float = 2.0):
+        """
+        Groups speech intervals separated by less than max_gap seconds, so short pauses
+        don't split a sentence into separate transcription calls.
+        """
+        regions = []
+        for start, end in self.intervals:
+            if regions and start - regions[-1][1] < max_gap:
+                regions[-1][1] = end
+            else:
+                regions.append([start, end])
+        return [(float(start), float(end)) for start, end in regions]
+
+    def mask(self, times):
+        """
+        Returns a boolean array telling which of the given times fall inside speech.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        idx = np.searchsorted(self.intervals[:, 0], times, side="right") - 1
+        inside = idx >= 0
+        inside[inside] = times[inside] < self.intervals[idx[inside], 1]
+        return inside
+
+    def slice(self, start: float, end: float):
+        """
+        Returns the speech map of [start, end) with times relative to start, e.g. for a clip.
+        """
+        clipped = np.clip(self.intervals, start, end)
+        clipped = clipped[clipped[:, 1] > clipped[:, 0]]
+        return SpeechMap(clipped - start, end - start)
+
+    def get_JSON(self):
+        return {
+            "version": SPEECH_MAP_VERSION,
+            "duration": self.duration,
+            "speech": self.intervals.round(3).tolist()
+        }
+
+    @classmethod
+    def from_JSON(cls, data: dict):
+        return cls(data["speech"], data["duration"])
+
+def read_speech_map(path: str):
+    """
+    Reads a speech map JSON, returns None when it is missing, unreadable or outdated.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Discarding unreadable speech map {path}: {e}")
+        return None
+    if data.get("version") != SPEECH_MAP_VERSION:
+        return None
+    return SpeechMap.from_JSON(data)
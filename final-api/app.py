@@ -12,7 +12,7 @@ from final.subtitles import apply_subtitles_to_clips
 from final.editing import edit_video
 from final.background import generate_background
 from final.voiceover import generate_voiceover
-from final.aspect_ratio import enhance_video_aspect_ratio
+from final.aspect_ratio import enhance_videos_aspect_ratio
 from final.transcription import transcribe_video
 from final.script import generate_stream_script
 
@@ -24,6 +24,7 @@ PROCESSED_FOLDER = 'processed_frames'
 OUTPUT_VIDEO_DIR = 'segmented_videos'
 OUTPUT_AUDIO_DIR = 'segmented_audio'
 FINAL_OUTPUT_DIR = 'final_clips'
+ASPECT_RATIO_OUTPUT_DIR = 'aspect_ratio_clips'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(PROCESSED_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_VIDEO_DIR, exist_ok=True)
@@ -125,7 +126,7 @@ def process_video():
         
         if aspect_ratio:
             logging.info("Adjusting aspect ratio...")
-            enhance_video_aspect_ratio(clip_paths)
+            enhance_videos_aspect_ratio(clip_paths, ASPECT_RATIO_OUTPUT_DIR)
         
         # Step 7: Virality Ranking
         logging.info("Ranking clips based on virality...")
@@ -2,34 +2,26 @@ import os
 import cv2
 import numpy as np
 import logging
+import tensorflow as tf
 from tensorflow.keras.models import load_model
 from scipy.stats import variation
+from frame_sampler import sample_frames
 
 # Constants
 IMAGE_HEIGHT, IMAGE_WIDTH = 64, 64
 MAX_PIXEL_VALUE = 255
 NO_OF_CHANNELS = 3
 TIMESTEPS = 10 
+PREDICT_BATCH_SIZE = 32
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Function to extract frames from a video
+# Function to extract frames spread evenly across a video
 def extract_frames(video_path):
-    frames_list = []
-    videoObj = cv2.VideoCapture(video_path)
     logging.info(f"Extracting frames from video: {video_path}")
-    while True:
-        success, image = videoObj.read()
-        if not success:
-            break
-        resized_frame = cv2.resize(image, (IMAGE_HEIGHT, IMAGE_WIDTH))
-        normalized_frame = resized_frame / MAX_PIXEL_VALUE
-        frames_list.append(normalized_frame)
-    videoObj.release()
-    while len(frames_list) < TIMESTEPS:
-        frames_list.append(frames_list[-1])
-    return frames_list[:TIMESTEPS]
+    frames = sample_frames(video_path, TIMESTEPS, (IMAGE_WIDTH, IMAGE_HEIGHT))
+    return list(frames / MAX_PIXEL_VALUE)
 
 # Load pre-trained action detection model
 model_path = '/Users/kesinishivaram/FragsAI/Model___Date_Time_2024_07_13__17_00_43___Loss_0.12093261629343033___Accuracy_0.9838709831237793.h5'
@@ -40,6 +32,9 @@ except Exception as e:
     logging.error(f"Error loading model: {e}")
     exit(1)
 
+# Compiled once and always called with PREDICT_BATCH_SIZE inputs so it is only traced once
+inference_fn = tf.function(lambda features: model(features, training=False), reduce_retracing=True)
+
 # Function to predict actions in a video
 def predict_actions(frames):
     features = np.array(frames).reshape(1, TIMESTEPS, IMAGE_HEIGHT, IMAGE_WIDTH, NO_OF_CHANNELS)
@@ -47,6 +42,20 @@ def predict_actions(frames):
     predictions = model.predict(features)
     return predictions
 
+# Function to predict actions for many videos in as few calls as possible
+def predict_actions_batch(frames_batch, batch_size=PREDICT_BATCH_SIZE):
+    predictions = []
+    for start in range(0, len(frames_batch), batch_size):
+        chunk = np.asarray(frames_batch[start:start + batch_size], dtype=np.float32)
+        chunk = chunk.reshape(-1, TIMESTEPS, IMAGE_HEIGHT, IMAGE_WIDTH, NO_OF_CHANNELS)
+        count = len(chunk)
+        # Pad the last chunk so every call has the same shape
+        if count < batch_size:
+            chunk = np.concatenate([chunk, np.zeros((batch_size - count,) + chunk.shape[1:], dtype=np.float32)])
+        predictions.append(inference_fn(tf.constant(chunk)).numpy()[:count])
+    logging.info(f"Predicted actions for {len(frames_batch)} videos in batches of {batch_size}")
+    return np.concatenate(predictions) if predictions else np.empty((0,))
+
 # Function to assess video quality
 def assess_video_quality(frames):
     brightness_scores = []
@@ -87,17 +96,20 @@ def normalize_scores(scores):
     return normalized_scores
 
 # Process each video in the given folder
-def process_videos_in_folder(folder_path):
+def process_videos_in_folder(folder_path, batch_size=PREDICT_BATCH_SIZE):
     video_files = [f for f in os.listdir(folder_path) if f.endswith(('.mp4', '.avi', '.mov'))]
     video_scores = {}
     
-    for video_file in video_files:
-        video_path = os.path.join(folder_path, video_file)
-        frames = extract_frames(video_path)
-        predictions = predict_actions(frames)
-        quality_metrics = assess_video_quality(frames)
-        virality_score = calculate_virality(predictions, quality_metrics)
-        video_scores[video_file] = virality_score
+    # Only one batch of frame tensors is held in memory at a time
+    for start in range(0, len(video_files), batch_size):
+        batch_files = video_files[start:start + batch_size]
+        frames_batch = [extract_frames(os.path.join(folder_path, video_file)) for video_file in batch_files]
+        predictions = predict_actions_batch(frames_batch, batch_size)
+
+        for i, video_file in enumerate(batch_files):
+            quality_metrics = assess_video_quality(frames_batch[i])
+            virality_score = calculate_virality(predictions[i:i + 1], quality_metrics)
+            video_scores[video_file] = virality_score
     
     scores = list(video_scores.values())
     normalized_scores = normalize_scores(scores)
@@ -1,16 +1,17 @@
 import os
-import cv2
 import numpy as np
 import logging
 import re
 import pandas as pd
 import joblib
 import ssl
+import nltk
 from tensorflow.keras.models import load_model
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score
+from frame_sampler import sample_frames
+from sentiment_engine import sentiment_analysis, sentiment_columns
 
 # Constants
 IMAGE_HEIGHT, IMAGE_WIDTH = 64, 64
@@ -21,50 +22,35 @@ TIMESTEPS = 10
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# SSL settings for NLTK
-ssl._create_default_https_context = ssl._create_unverified_context
-
-# Ensure the VADER lexicon is downloaded
-nltk.download('vader_lexicon')
-
-# Function to extract frames from a video
+# Function to extract frames spread evenly across a video
 def extract_frames(video_path):
-    frames_list = []
-    videoObj = cv2.VideoCapture(video_path)
     logging.info(f"Extracting frames from video: {video_path}")
-    while True:
-        success, image = videoObj.read()
-        if not success:
-            break
-        resized_frame = cv2.resize(image, (IMAGE_HEIGHT, IMAGE_WIDTH))
-        normalized_frame = resized_frame / MAX_PIXEL_VALUE
-        frames_list.append(normalized_frame)
-    videoObj.release()
-    while len(frames_list) < TIMESTEPS:
-        frames_list.append(frames_list[-1])
-    return frames_list[:TIMESTEPS]
-
-# Load pre-trained action detection model
+    frames = sample_frames(video_path, TIMESTEPS, (IMAGE_WIDTH, IMAGE_HEIGHT))
+    return list(frames / MAX_PIXEL_VALUE)
+
+# Pre-trained action detection model, loaded on first use.
+# Nothing heavy runs on import, sentiment worker processes re-import this module when it is __main__.
 action_model_path = '/Users/kesinishivaram/FragsAI/action_detection_model/model.h5'
-logging.info(f"Loading action detection model from: {action_model_path}")
-try:
-    action_model = load_model(action_model_path, compile=False)
-except Exception as e:
-    logging.error(f"Error loading action detection model: {e}")
-    exit(1)
+action_model = None
+
+def get_action_model():
+    global action_model
+    if action_model is None:
+        logging.info(f"Loading action detection model from: {action_model_path}")
+        try:
+            action_model = load_model(action_model_path, compile=False)
+        except Exception as e:
+            logging.error(f"Error loading action detection model: {e}")
+            raise
+    return action_model
 
 # Function to predict actions in a video
 def predict_actions(frames):
     features = np.array(frames).reshape(1, TIMESTEPS, IMAGE_HEIGHT, IMAGE_WIDTH, NO_OF_CHANNELS)
     logging.info(f"Predicting actions for frames with shape: {features.shape}")
-    predictions = action_model.predict(features)
+    predictions = get_action_model().predict(features)
     return predictions
 
-# Function to perform sentiment analysis
-def sentiment_analysis(text: str) -> dict:
-    vader_analyzer = SentimentIntensityAnalyzer()
-    return vader_analyzer.polarity_scores(text)
-
 # Function to load and concatenate CSVs
 def load_and_concatenate_csvs(folder_path: str) -> pd.DataFrame:
     csv_files = [f for f in os.listdir(folder_path) if f.endswith('.csv')]
@@ -78,12 +64,8 @@ def load_and_concatenate_csvs(folder_path: str) -> pd.DataFrame:
 
 # Function to preprocess data
 def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
-    df['subtitle_sentiment'] = df['subtitles'].apply(lambda x: sentiment_analysis(x) if pd.notnull(x) else {'neg': 0, 'neu': 0, 'pos': 0, 'compound': 0})
-    df['top_comment_sentiment'] = df['top_comment'].apply(lambda x: sentiment_analysis(x) if pd.notnull(x) else {'neg': 0, 'neu': 0, 'pos': 0, 'compound': 0})
-
-    df = pd.concat([df.drop(['subtitle_sentiment', 'top_comment_sentiment'], axis=1),
-                    df['subtitle_sentiment'].apply(pd.Series),
-                    df['top_comment_sentiment'].apply(pd.Series)], axis=1)
+    # Subtitle then comment sentiment columns, scored together in one parallel pass
+    df = pd.concat([df, sentiment_columns(df, ['subtitles', 'top_comment'])], axis=1)
 
     df['duration_seconds'] = df['duration'].apply(lambda x: int(re.search(r'\d+S', x).group(0).replace('S', '')) if 'S' in x else 0)
     
@@ -151,6 +133,12 @@ def predict_virality(srt_file_path: str, video_path: str, model_filename: str =
     return virality_score[0]
 
 if __name__ == "__main__":
+    # SSL settings for NLTK
+    ssl._create_default_https_context = ssl._create_unverified_context
+
+    # Ensure the VADER lexicon is downloaded
+    nltk.download('vader_lexicon')
+
     # TRAINING AND SAVING THE MODEL
     folder_path = "/Users/kesinishivaram/FragsAI/youtube_data"
     
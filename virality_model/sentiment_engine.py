@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+# Same order as the dict returned by SentimentIntensityAnalyzer.polarity_scores
+SENTIMENT_KEYS = ['neg', 'neu', 'pos', 'compound']
+SENTIMENT_CHUNK_SIZE = 2000
+
+# One analyzer per process, the lexicon is only loaded once
+_analyzer = None
+
+def get_analyzer() -> SentimentIntensityAnalyzer:
+    global _analyzer
+    if _analyzer is None:
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+def sentiment_analysis(text: str) -> dict:
+    return get_analyzer().polarity_scores(text)
+
+def _score_chunk(texts: list) -> np.ndarray:
+    analyzer = get_analyzer()
+    scores = np.zeros((len(texts), len(SENTIMENT_KEYS)), dtype=np.float64)
+    for i, text in enumerate(texts):
+        if pd.notnull(text):
+            polarity = analyzer.polarity_scores(str(text))
+            scores[i] = [polarity[key] for key in SENTIMENT_KEYS]
+    return scores
+
+def score_texts(texts, n_jobs: int = None, chunk_size: int = SENTIMENT_CHUNK_SIZE) -> np.ndarray:
+    """
+    Scores texts in chunks across worker processes.
+    Returns an (n, 4) array of neg, neu, pos and compound scores, missing texts score 0.
+    """
+    texts = list(texts)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    if not chunks:
+        return np.zeros((0, len(SENTIMENT_KEYS)), dtype=np.float64)
+
+    if n_jobs == 1 or len(chunks) == 1:
+        results = [_score_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=get_analyzer) as executor:
+            results = list(executor.map(_score_chunk, chunks))
+
+    return np.vstack(results)
+
+def sentiment_columns(df: pd.DataFrame, columns: list, n_jobs: int = None) -> pd.DataFrame:
+    """
+    Scores several text columns in a single pass and returns their numeric sentiment columns,
+    neg/neu/pos/compound for each source column in order.
+    """
+    texts = [text for column in columns for text in df[column]]
+    scores = score_texts(texts, n_jobs)
+    frames = [
+        pd.DataFrame(scores[i * len(df):(i + 1) * len(df)], columns=SENTIMENT_KEYS, index=df.index)
+        for i in range(len(columns))
+    ]
+    return pd.concat(frames, axis=1)
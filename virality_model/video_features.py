@@ -0,0 +1,62 @@
+import logging
+import subprocess
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+# Features are computed on a low resolution grayscale stream decoded by ffmpeg at a sampled fps.
+# Training and ranking must both use these features, a model fitted on full-resolution,
+# every-frame statistics does not score sampled ones correctly.
+FEATURE_FPS = 5
+FEATURE_WIDTH, FEATURE_HEIGHT = 160, 90
+FEATURE_BLOCK_SIZE = 64
+
+def extract_video_features_batched(video_path, fps=FEATURE_FPS, width=FEATURE_WIDTH, height=FEATURE_HEIGHT, block_size=FEATURE_BLOCK_SIZE):
+    """
+    Returns per-frame grayscale [mean, std] of a video. ffmpeg scales and samples
+    the frames and the statistics are reduced over blocks of stacked frames at once.
+    Raises RuntimeError if ffmpeg fails to decode the video.
+    """
+    command = [
+        "ffmpeg", "-loglevel", "error", "-i", video_path,
+        "-vf", f"fps={fps},scale={width}:{height}:flags=area",
+        "-pix_fmt", "gray", "-f", "rawvideo", "-"
+    ]
+    frame_bytes = width * height
+    features = []
+
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+        while True:
+            data = process.stdout.read(frame_bytes * block_size)
+            count = len(data) // frame_bytes
+            if count == 0:
+                break
+            block = np.frombuffer(data, dtype=np.uint8, count=count * frame_bytes).reshape(count, frame_bytes).astype(np.float32)
+            features.append(np.stack([block.mean(axis=1), block.std(axis=1)], axis=1))
+        # stderr is only read once stdout is drained, -loglevel error keeps it small enough not to block
+        error = process.stderr.read().decode(errors="replace").strip()
+        return_code = process.wait()
+
+    if return_code != 0:
+        logging.error(f"ffmpeg failed on {video_path} ({return_code}): {error}")
+        raise RuntimeError(f"Could not extract features from {video_path}: {error or f'ffmpeg exited with {return_code}'}")
+
+    return np.concatenate(features) if features else np.empty((0, 2), dtype=np.float32)
+
+def extract_features_from_clips(clip_paths, max_workers=None):
+    """
+    Extracts the mean clip features for several clips in parallel.
+    Decoding happens in ffmpeg processes, so threads are enough to keep every core busy.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        features = list(executor.map(extract_video_features_batched, clip_paths))
+    return np.array([np.mean(clip_features, axis=0) for clip_features in features])
+
+def save_clip_features(clip_paths, features_file, max_workers=None):
+    """
+    Writes the training feature matrix for clip_paths (one row per clip) to a .npy file,
+    with the same extractor rank_clips uses.
+    """
+    features = extract_features_from_clips(clip_paths, max_workers)
+    np.save(features_file, features)
+    logging.info(f"Saved features of {len(clip_paths)} clips to {features_file}")
+    return features
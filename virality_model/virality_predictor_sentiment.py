@@ -3,7 +3,8 @@ import os
 import re
 import nltk
 import pandas as pd
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from sentiment_engine import sentiment_analysis, sentiment_columns
+from virality_service import get_service
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, r2_score
@@ -21,10 +22,6 @@ def extract_text_from_srt(srt_content: str) -> str:
     cleaned_text = cleaned_text.replace('\n', ' ').strip()
     return cleaned_text
 
-def sentiment_analysis(text: str) -> dict:
-    vader_analyzer = SentimentIntensityAnalyzer()
-    return vader_analyzer.polarity_scores(text)
-
 def load_and_concatenate_csvs(folder_path: str) -> pd.DataFrame:
     csv_files = [f for f in os.listdir(folder_path) if f.endswith('.csv')]
     df_list = []
@@ -36,12 +33,8 @@ def load_and_concatenate_csvs(folder_path: str) -> pd.DataFrame:
     return concatenated_df
 
 def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
-    df['subtitle_sentiment'] = df['subtitles'].apply(lambda x: sentiment_analysis(x) if pd.notnull(x) else {'neg': 0, 'neu': 0, 'pos': 0, 'compound': 0})
-    df['top_comment_sentiment'] = df['top_comment'].apply(lambda x: sentiment_analysis(x) if pd.notnull(x) else {'neg': 0, 'neu': 0, 'pos': 0, 'compound': 0})
-
-    df = pd.concat([df.drop(['subtitle_sentiment', 'top_comment_sentiment'], axis=1),
-                    df['subtitle_sentiment'].apply(pd.Series),
-                    df['top_comment_sentiment'].apply(pd.Series)], axis=1)
+    # Subtitle then comment sentiment columns, scored together in one parallel pass
+    df = pd.concat([df, sentiment_columns(df, ['subtitles', 'top_comment'])], axis=1)
 
     df['duration_seconds'] = df['duration'].apply(lambda x: int(re.search(r'\d+S', x).group(0).replace('S', '')) if 'S' in x else 0)
     
@@ -90,13 +83,17 @@ def preprocess_transcript(srt_file_path: str, model) -> pd.DataFrame:
     
     return sentiment_df
 
+def predict_virality_batch(srt_file_paths: list, model_filename: str = 'virality_model.pkl', mmap: bool = False):
+    transcripts = []
+    for srt_file_path in srt_file_paths:
+        with open(srt_file_path, 'r', encoding='utf-8') as file:
+            transcripts.append(extract_text_from_srt(file.read()))
+
+    # The model stays loaded between calls and the whole batch is scored in one predict
+    return get_service(model_filename, mmap).score_transcripts(transcripts)
+
 def predict_virality(srt_file_path: str, model_filename: str = 'virality_model.pkl'):
-    model = joblib.load(model_filename)
-    features = preprocess_transcript(srt_file_path, model)
-    
-    virality_score = model.predict(features)
-    
-    return virality_score[0]
+    return predict_virality_batch([srt_file_path], model_filename)[0]
 
 if __name__ == "__main__":
     # TRAINING AND SAVING THE MODEL
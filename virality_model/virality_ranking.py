@@ -1,5 +1,4 @@
 import numpy as np
-import cv2
 import os
 import pickle
 from sklearn.linear_model import LinearRegression
@@ -8,30 +7,12 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import make_pipeline
 from sklearn.model_selection import GridSearchCV
 from tqdm import tqdm
+from video_features import extract_video_features_batched, extract_features_from_clips
 
 # Set up logging
 import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def extract_video_features(video_path):
-    cap = cv2.VideoCapture(video_path)
-    features = []
-    
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        mean = np.mean(gray)
-        std = np.std(gray)
-        features.append([mean, std])
-    
-    cap.release()
-    cv2.destroyAllWindows()
-    
-    return np.array(features)
-
 def scrape_tiktok_hashtags(hashtags, num_videos=100):
     # Placeholder for actual TikTok scraping logic
     data = []
@@ -44,18 +25,18 @@ def scrape_tiktok_hashtags(hashtags, num_videos=100):
     return data
 
 def extract_features_from_clip(clip_path):
-    features = extract_video_features(clip_path)
+    features = extract_video_features_batched(clip_path)
     return np.mean(features, axis=0)  # Use mean of features as a simple example
 
 def rank_clips(clip_paths, model, scaler):
-    features = [extract_features_from_clip(clip_path) for clip_path in clip_paths]
-    features = np.array(features)
+    features = extract_features_from_clips(clip_paths)
     features_scaled = scaler.transform(features)
     scores = model.predict(features_scaled)
     ranked_clips = sorted(zip(scores, clip_paths), reverse=True, key=lambda x: x[0])
     return ranked_clips
 
 def train_virality_model(video_features_file, labels_file, model_file, scaler_file):
+    # The features must come from video_features.save_clip_features, the extractor rank_clips uses
     X = np.load(video_features_file)
     y = np.load(labels_file)
     
@@ -0,0 +1,53 @@
+import threading
+import numpy as np
+import pandas as pd
+import joblib
+from sentiment_engine import SENTIMENT_KEYS, score_texts
+
+class ViralityScoringService():
+    """
+    Keeps the virality RandomForest loaded and scores whole batches of clips in one predict call.
+
+    With mmap=True the model's arrays are memory-mapped read-only (requires an uncompressed
+    joblib dump), so worker processes that load the same file share its pages.
+    """
+    def __init__(self, model_filename: str = 'virality_model.pkl', mmap: bool = False):
+        self.model = joblib.load(model_filename, mmap_mode='r' if mmap else None)
+        self.feature_names = list(self.model.feature_names_in_)
+
+    def build_features(self, transcripts: list, extra_features: dict = None) -> pd.DataFrame:
+        """
+        Builds the model's feature matrix for a batch of transcripts.
+        Sentiment features come from the transcripts, extra_features maps other feature names
+        to a scalar or one value per transcript, and anything else is 0 like in preprocess_transcript.
+        """
+        extra_features = extra_features or {}
+        sentiment = score_texts(transcripts)
+        features = np.zeros((len(transcripts), len(self.feature_names)), dtype=np.float64)
+
+        for j, name in enumerate(self.feature_names):
+            if name in SENTIMENT_KEYS:
+                features[:, j] = sentiment[:, SENTIMENT_KEYS.index(name)]
+            elif name in extra_features:
+                features[:, j] = extra_features[name]
+
+        return pd.DataFrame(features, columns=self.feature_names)
+
+    def score_features(self, features: pd.DataFrame) -> np.ndarray:
+        return self.model.predict(features)
+
+    def score_transcripts(self, transcripts: list, extra_features: dict = None) -> np.ndarray:
+        if not transcripts:
+            return np.empty(0)
+        return self.score_features(self.build_features(transcripts, extra_features))
+
+# Services are loaded once per model file and process
+_services = {}
+_services_lock = threading.Lock()
+
+def get_service(model_filename: str = 'virality_model.pkl', mmap: bool = False) -> ViralityScoringService:
+    key = (model_filename, mmap)
+    with _services_lock:
+        if key not in _services:
+            _services[key] = ViralityScoringService(model_filename, mmap)
+        return _services[key]